@@ -3,12 +3,62 @@ import os
 import logging
 import json
 import random
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
-from datetime import datetime
+import socket
+import gzip
+import itertools
+from functools import partial
+from types import SimpleNamespace
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from datetime import datetime, timezone
 import threading
 import time
 
+# orjson parses bytes directly; fall back to the stdlib decoder when it is missing
+try:
+    import orjson
+    _loads = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    orjson = None
+    _loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+
+# Responses are msgspec Structs, encoded field by field from C. Without msgspec they degrade to
+# keyword-constructed namespaces, encoded by orjson or else the stdlib codec; default=vars
+# serializes those namespaces.
+try:
+    import msgspec
+    Struct = msgspec.Struct
+    _dumps = msgspec.json.Encoder().encode
+except ImportError:
+    class Struct(SimpleNamespace):
+        """Stand-in for msgspec.Struct when msgspec is not installed"""
+
+    if orjson is not None:
+        _dumps = partial(orjson.dumps, default=vars)
+    else:
+        def _dumps(data):
+            """Serialize data to JSON bytes"""
+            return json.dumps(data, separators=(',', ':'), default=vars).encode('utf-8')
+
+# Starlette is the primary HTTP layer; the stdlib server below is kept as a fallback
+try:
+    from starlette.applications import Starlette
+    from starlette.exceptions import HTTPException
+    from starlette.middleware import Middleware
+    from starlette.middleware.cors import CORSMiddleware
+    from starlette.middleware.gzip import GZipMiddleware
+    from starlette.responses import Response
+    from starlette.routing import Route
+except ImportError:
+    Starlette = None
+
+# NumPy is optional; it is only used to bulk-fill the random buffer below
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -21,48 +71,460 @@ models = {
     'risk_assessor': {'loaded': True, 'version': '1.0.0'}
 }
 
+# Immutable set of known model names for the per-request lookups
+MODEL_NAMES = frozenset(models)
+
+# Health check payload is static apart from the timestamp, so serialize it once
+_HEALTH_PREFIX = _dumps({
+    "status": "healthy",
+    "service": "HemoLink AI ML Services",
+    "version": "1.0.0-demo",
+    "models_loaded": len(models)
+})[:-1] + b',"timestamp":"'
+_HEALTH_SUFFIX = b'"}'
+
+# Base donor availability per blood type
+BASE_AVAILABILITY = {
+    'O_NEGATIVE': 0.6,  # Universal donor, lower availability
+    'O_POSITIVE': 0.8,  # Most common, higher availability
+    'A_POSITIVE': 0.7,
+    'A_NEGATIVE': 0.5,
+    'B_POSITIVE': 0.6,
+    'B_NEGATIVE': 0.4,
+    'AB_POSITIVE': 0.5,
+    'AB_NEGATIVE': 0.3
+}
+
+# Blood type compatibility matrix: donor type -> compatible patient types
+COMPATIBLE_RECIPIENTS = {
+    'O_NEGATIVE': frozenset({'O_NEGATIVE', 'O_POSITIVE', 'A_NEGATIVE', 'A_POSITIVE', 'B_NEGATIVE', 'B_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'}),
+    'O_POSITIVE': frozenset({'O_POSITIVE', 'A_POSITIVE', 'B_POSITIVE', 'AB_POSITIVE'}),
+    'A_NEGATIVE': frozenset({'A_NEGATIVE', 'A_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'}),
+    'A_POSITIVE': frozenset({'A_POSITIVE', 'AB_POSITIVE'}),
+    'B_NEGATIVE': frozenset({'B_NEGATIVE', 'B_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'}),
+    'B_POSITIVE': frozenset({'B_POSITIVE', 'AB_POSITIVE'}),
+    'AB_NEGATIVE': frozenset({'AB_NEGATIVE', 'AB_POSITIVE'}),
+    'AB_POSITIVE': frozenset({'AB_POSITIVE'})
+}
+
+# The same matrix packed into one 64-bit integer: byte `donor` holds the
+# recipient bitmask for that donor, so a lookup is a shift and a mask
+BT_IDX = {blood_type: i for i, blood_type in enumerate(COMPATIBLE_RECIPIENTS)}
+COMPAT_MATRIX = sum(
+    1 << (BT_IDX[donor] * 8 + BT_IDX[patient])
+    for donor, recipients in COMPATIBLE_RECIPIENTS.items()
+    for patient in recipients
+)
+
+def is_blood_compatible(donor_blood_type, patient_blood_type):
+    """Check whether a donor blood type can give to a patient blood type"""
+    # Unknown types map to shifts of 64 or more, which always read a 0 bit
+    shift = BT_IDX.get(donor_blood_type, 8) * 8 + BT_IDX.get(patient_blood_type, 64)
+    return bool((COMPAT_MATRIX >> shift) & 1)
+
+# Simulated training/metrics values draw from a buffer refilled in bulk rather
+# than calling random.random() once per field
+_RAND_BUFFER_SIZE = 8192
+_rand_index = itertools.count()
+
+def _fill_rand_buffer():
+    """Generate a fresh buffer of uniform floats in [0, 1)"""
+    if np is not None:
+        return np.random.default_rng().random(_RAND_BUFFER_SIZE).tolist()
+    return [random.random() for _ in range(_RAND_BUFFER_SIZE)]
+
+_rand_buffer = _fill_rand_buffer()
+
+def _rand():
+    """Return the next buffered uniform float in [0, 1)"""
+    global _rand_buffer
+    i = next(_rand_index) % _RAND_BUFFER_SIZE
+    value = _rand_buffer[i]
+    if i == _RAND_BUFFER_SIZE - 1:
+        _rand_buffer = _fill_rand_buffer()
+    return value
+
+# 64-bit LCG (Knuth's MMIX constants) for the demand forecast jitter. Unlocked:
+# concurrent callers may occasionally see the same value, which is fine for demo noise.
+_MASK64 = (1 << 64) - 1
+_lcg_state = time.time_ns() & _MASK64
+
+def _jitter():
+    """Return a pseudo-random float in [-1, 1)"""
+    global _lcg_state
+    _lcg_state = (_lcg_state * 6364136223846793005 + 1442695040888963407) & _MASK64
+    return (_lcg_state >> 11) / (1 << 52) - 1.0
+
+def _randint(low, high):
+    """Return a buffered random integer in [low, high]"""
+    return low + int(_rand() * (high - low + 1))
+
+# Response shapes. Fields are passed by keyword and encoded in declaration order.
+class DonorAvailabilityResult(Struct):
+    availability_score: float
+    availability_category: str
+    confidence: float
+    estimated_response_time: dict
+    recommendations: list
+
+class DemandForecastResult(Struct):
+    forecasted_demand: float
+    confidence: float
+    confidence_interval: dict
+    forecast_period: int
+    recommendations: list
+
+class CompatibilityResult(Struct):
+    score: float
+    compatible: bool
+    confidence: float
+    blood_compatibility: dict
+    recommendations: list
+
+class RiskAssessmentResult(Struct):
+    risk_score: float
+    risk_category: str
+    confidence: float
+    assessment_type: str
+    recommendations: list
+
+class PredictionResponse(Struct):
+    prediction_type: str
+    result: Struct
+    confidence: float
+    model_version: str
+    timestamp: str
+
+class BatchResponse(Struct):
+    prediction_type: str
+    results: list
+    count: int
+    model_version: str
+    timestamp: str
+
+class TrainingResult(Struct):
+    status: str
+    accuracy: float
+    training_samples: int
+    training_time_seconds: int
+
+class TrainingResponse(Struct):
+    status: str
+    model: str
+    training_result: TrainingResult
+    timestamp: str
+
+class ModelMetrics(Struct):
+    accuracy: float
+    precision: float
+    recall: float
+    f1_score: float
+    last_trained: str
+    training_samples: int
+
+class MetricsResponse(Struct):
+    model: str
+    version: str
+    metrics: ModelMetrics
+    timestamp: str
+
+# Response timestamps have one-second resolution; the formatted string is
+# cached as a (second, text) tuple so it is swapped atomically between threads
+_ts_cache = (0, '')
+
+def now_iso():
+    """Return the current UTC time as an ISO 8601 string, cached per second"""
+    global _ts_cache
+    second = int(time.time())
+    cached_second, text = _ts_cache
+    if second != cached_second:
+        text = datetime.fromtimestamp(second, timezone.utc).isoformat()
+        _ts_cache = (second, text)
+    return text
+
+def health_check_body():
+    """Build the serialized health check response"""
+    return _HEALTH_PREFIX + now_iso().encode('ascii') + _HEALTH_SUFFIX
+
+# Error bodies are pre-encoded templates; only the message and timestamp vary
+_ERROR_500 = b'{"error":"Internal Server Error","message":%s,"timestamp":"%s"}'
+_ERROR_4XX = b'{"error":"Bad Request","message":%s,"timestamp":"%s"}'
+
+def error_body(message, status_code=500):
+    """Build the serialized error response"""
+    template = _ERROR_500 if status_code == 500 else _ERROR_4XX
+    return template % (_dumps(message), now_iso().encode('ascii'))
+
+def prediction_response(prediction_type, result):
+    """Wrap a prediction result in the common response envelope"""
+    return PredictionResponse(
+        prediction_type=prediction_type,
+        result=result,
+        confidence=result.confidence,
+        model_version="1.0.0-demo",
+        timestamp=now_iso()
+    )
+
+def batch_items(request_data):
+    """Return the list of items in a batch request, or None if it is malformed"""
+    items = request_data.get('items') if isinstance(request_data, dict) else None
+    return items if isinstance(items, list) else None
+
+def batch_response(prediction_type, predict, items):
+    """Run a prediction function over a batch and wrap the ordered results"""
+    results = [predict(item) for item in items]
+    return BatchResponse(
+        prediction_type=prediction_type,
+        results=results,
+        count=len(results),
+        model_version="1.0.0-demo",
+        timestamp=now_iso()
+    )
+
+def predict_donor_availability(request_data):
+    """Predict donor availability"""
+    # Simplified prediction logic for demo
+    blood_type = request_data.get('blood_type', 'O_POSITIVE')
+    urgency = request_data.get('urgency_level', 1)
+
+    # Generate realistic prediction based on blood type and urgency
+    base_availability = BASE_AVAILABILITY.get(blood_type, 0.7)
+
+    # Adjust for urgency
+    urgency_factor = min(urgency / 5.0, 1.0)
+    availability_score = base_availability * (1 + urgency_factor * 0.2)
+    availability_score = min(availability_score, 1.0)
+
+    return DonorAvailabilityResult(
+        availability_score=availability_score,
+        availability_category='HIGH' if availability_score > 0.7 else 'MEDIUM' if availability_score > 0.5 else 'LOW',
+        confidence=0.85,
+        estimated_response_time={'estimated_hours': int(24 * (2 - availability_score)), 'min_hours': 2, 'max_hours': 48},
+        recommendations=['Contact regular donors', 'Check nearby blood banks'] if availability_score < 0.6 else ['Standard protocols apply']
+    )
+
+def forecast_demand(request_data):
+    """Forecast blood demand"""
+    # Simplified demand forecasting for demo
+    forecast_days = request_data.get('forecast_days', 7)
+    hospital_capacity = request_data.get('hospital_capacity', 100)
+    population_served = request_data.get('population_served', 50000)
+
+    # Generate realistic demand forecast
+    base_demand = population_served / 5000  # Base demand per day
+    seasonal_factor = 1.0 + 0.2 * _jitter()  # ±20% seasonal variation
+    forecasted_demand = base_demand * seasonal_factor
+
+    return DemandForecastResult(
+        forecasted_demand=round(forecasted_demand, 1),
+        confidence=0.82,
+        confidence_interval={
+            'lower_bound': round(forecasted_demand * 0.8, 1),
+            'upper_bound': round(forecasted_demand * 1.2, 1)
+        },
+        forecast_period=forecast_days,
+        recommendations=[
+            'Monitor inventory levels closely',
+            'Schedule regular donor drives'
+        ] if forecasted_demand > 15 else ['Standard inventory management']
+    )
+
+def assess_compatibility(request_data):
+    """Assess donor-patient compatibility"""
+    # Simplified compatibility assessment for demo
+    donor = request_data.get('donor', {})
+    patient = request_data.get('patient', {})
+
+    donor_blood_type = donor.get('blood_type', 'O_POSITIVE')
+    patient_blood_type = patient.get('blood_type', 'O_POSITIVE')
+
+    is_compatible = is_blood_compatible(donor_blood_type, patient_blood_type)
+    compatibility_score = 0.95 if is_compatible else 0.1
+
+    # Add some randomness for other factors
+    if is_compatible:
+        compatibility_score *= (0.8 + 0.2 * random.random())
+
+    return CompatibilityResult(
+        score=compatibility_score,
+        compatible=compatibility_score > 0.7,
+        confidence=0.9,
+        blood_compatibility={
+            'compatible': is_compatible,
+            'donor_type': donor_blood_type,
+            'patient_type': patient_blood_type
+        },
+        recommendations=[
+            'Proceed with standard protocols'
+        ] if is_compatible else [
+            'Find alternative donor with compatible blood type'
+        ]
+    )
+
+def assess_risk(request_data):
+    """Assess donation or transfusion risk"""
+    # Simplified risk assessment for demo
+    subject = request_data.get('subject', {})
+    assessment_type = request_data.get('assessment_type', 'donation')
+
+    age = subject.get('age', 30)
+    chronic_conditions = len(subject.get('chronic_conditions', []))
+    emergency_procedure = request_data.get('emergency_procedure', False)
+
+    # Calculate risk score
+    risk_score = 0.1  # Base risk
+
+    # Age factor
+    if age > 65:
+        risk_score += 0.3
+    elif age < 18:
+        risk_score += 0.2
+
+    # Chronic conditions
+    risk_score += chronic_conditions * 0.15
+
+    # Emergency procedure
+    if emergency_procedure:
+        risk_score += 0.4
+
+    risk_score = min(risk_score, 1.0)
+
+    # Categorize risk
+    if risk_score < 0.3:
+        risk_category = 'LOW'
+    elif risk_score < 0.6:
+        risk_category = 'MODERATE'
+    elif risk_score < 0.8:
+        risk_category = 'HIGH'
+    else:
+        risk_category = 'CRITICAL'
+
+    return RiskAssessmentResult(
+        risk_score=risk_score,
+        risk_category=risk_category,
+        confidence=0.88,
+        assessment_type=assessment_type,
+        recommendations=[
+            'Proceed with standard protocols'
+        ] if risk_score < 0.3 else [
+            'Enhanced monitoring required',
+            'Consider specialist consultation'
+        ] if risk_score < 0.6 else [
+            'High-risk procedure',
+            'Specialist supervision required',
+            'Emergency protocols may be needed'
+        ]
+    )
+
+def train_model(model_name):
+    """Simulate training a model"""
+    training_result = TrainingResult(
+        status="completed",
+        accuracy=0.85 + 0.1 * _rand(),
+        training_samples=_randint(800, 1200),
+        training_time_seconds=_randint(30, 120)
+    )
+
+    return TrainingResponse(
+        status="success",
+        model=model_name,
+        training_result=training_result,
+        timestamp=now_iso()
+    )
+
+def model_metrics(model_name):
+    """Generate demo metrics for a model"""
+    metrics = ModelMetrics(
+        accuracy=0.85 + 0.1 * _rand(),
+        precision=0.82 + 0.1 * _rand(),
+        recall=0.88 + 0.1 * _rand(),
+        f1_score=0.85 + 0.1 * _rand(),
+        last_trained=now_iso(),
+        training_samples=_randint(800, 1200)
+    )
+
+    return MetricsResponse(
+        model=model_name,
+        version="1.0.0-demo",
+        metrics=metrics,
+        timestamp=now_iso()
+    )
+
+# Responses larger than this are gzipped (level 1) for clients that accept it
+GZIP_MIN_SIZE = 1024
+
+# CORS headers for the built-in server, pre-encoded as one header block
+CORS_HEADERS = (
+    b'Access-Control-Allow-Origin: *\r\n'
+    b'Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n'
+    b'Access-Control-Allow-Headers: Content-Type\r\n'
+)
+
 class MLServiceHandler(BaseHTTPRequestHandler):
     """HTTP request handler for ML services"""
 
+    # HTTP/1.1 keeps connections alive between requests; every response
+    # carries a Content-Length so clients can frame them. Idle keep-alive
+    # connections are dropped after `timeout` seconds to free their thread.
+    protocol_version = 'HTTP/1.1'
+    timeout = 30
+
+    def setup(self):
+        """Disable Nagle's algorithm so small JSON replies go out immediately"""
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
     def _set_cors_headers(self):
-        """Set CORS headers"""
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        """Set CORS headers (must follow send_response, which opens the header buffer)"""
+        self._headers_buffer.append(CORS_HEADERS)
 
     def _send_json_response(self, data, status_code=200):
         """Send JSON response"""
+        self._send_json_bytes(_dumps(data), status_code)
+
+    def _send_json_bytes(self, payload, status_code=200):
+        """Send already serialized JSON response"""
+        # send_response queues the status line, Server and Date headers; the
+        # rest of the head and the body join that buffer so the whole response
+        # leaves in a single sendall (wfile is unbuffered)
         self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self._set_cors_headers()
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
+        buffer = self._headers_buffer
+        if len(payload) > GZIP_MIN_SIZE and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            payload = gzip.compress(payload, compresslevel=1)
+            buffer.append(b'Content-Encoding: gzip\r\nVary: Accept-Encoding\r\n')
+        buffer.append(b'Content-Type: application/json\r\nContent-Length: %d\r\n' % len(payload))
+        buffer.append(CORS_HEADERS)
+        buffer.append(b'\r\n')
+        buffer.append(payload)
+        self._headers_buffer = []
+        self.wfile.write(b''.join(buffer))
 
     def _send_error_response(self, message, status_code=500):
         """Send error response"""
-        error_data = {
-            'error': 'Internal Server Error' if status_code == 500 else 'Bad Request',
-            'message': message,
-            'timestamp': datetime.now().isoformat()
-        }
-        self._send_json_response(error_data, status_code)
+        self._send_json_bytes(error_body(message, status_code), status_code)
+
+    def _request_path(self):
+        """Return the request path without its query string"""
+        query = self.path.find('?')
+        return self.path if query < 0 else self.path[:query]
 
     def do_OPTIONS(self):
         """Handle OPTIONS requests for CORS"""
         self.send_response(200)
+        self.send_header('Content-Length', '0')
         self._set_cors_headers()
         self.end_headers()
 
     def do_GET(self):
         """Handle GET requests"""
         try:
-            parsed_path = urlparse(self.path)
-            path = parsed_path.path
+            path = self._request_path()
 
-            if path == '/health':
-                self._handle_health_check()
+            handler = GET_ROUTES.get(path)
+            if handler:
+                handler(self)
             elif path.startswith('/models/') and path.endswith('/metrics'):
-                model_name = path.split('/')[2]
+                model_name = path[len('/models/'):-len('/metrics')]
                 self._handle_model_metrics(model_name)
             else:
                 self._send_error_response('Route not found', 404)
@@ -74,29 +536,23 @@ class MLServiceHandler(BaseHTTPRequestHandler):
     def do_POST(self):
         """Handle POST requests"""
         try:
-            parsed_path = urlparse(self.path)
-            path = parsed_path.path
+            path = self._request_path()
 
             # Read request body
             content_length = int(self.headers.get('Content-Length', 0))
-            request_body = self.rfile.read(content_length).decode('utf-8')
-            request_data = json.loads(request_body) if request_body else {}
-
-            if path == '/predict/donor-availability':
-                self._handle_donor_prediction(request_data)
-            elif path == '/predict/demand-forecast':
-                self._handle_demand_forecast(request_data)
-            elif path == '/predict/compatibility':
-                self._handle_compatibility_assessment(request_data)
-            elif path == '/predict/risk-assessment':
-                self._handle_risk_assessment(request_data)
+            request_body = self.rfile.read(content_length)
+            request_data = _loads(request_body) if request_body else {}
+
+            handler = POST_ROUTES.get(path)
+            if handler:
+                handler(self, request_data)
             elif path.startswith('/models/train/'):
-                model_name = path.split('/')[-1]
+                model_name = path[len('/models/train/'):]
                 self._handle_model_training(model_name)
             else:
                 self._send_error_response('Route not found', 404)
 
-        except json.JSONDecodeError:
+        except JSONDecodeError:
             self._send_error_response('Invalid JSON in request body', 400)
         except Exception as e:
             logger.error(f"POST request failed: {e}")
@@ -104,55 +560,13 @@ class MLServiceHandler(BaseHTTPRequestHandler):
 
     def _handle_health_check(self):
         """Handle health check endpoint"""
-        response = {
-            "status": "healthy",
-            "service": "HemoLink AI ML Services",
-            "version": "1.0.0-demo",
-            "models_loaded": len(models),
-            "timestamp": datetime.now().isoformat()
-        }
-        self._send_json_response(response)
+        self._send_json_bytes(health_check_body())
 
     def _handle_donor_prediction(self, request_data):
         """Handle donor availability prediction"""
         try:
-            # Simplified prediction logic for demo
-            blood_type = request_data.get('blood_type', 'O_POSITIVE')
-            urgency = request_data.get('urgency_level', 1)
-
-            # Generate realistic prediction based on blood type and urgency
-            base_availability = {
-                'O_NEGATIVE': 0.6,  # Universal donor, lower availability
-                'O_POSITIVE': 0.8,  # Most common, higher availability
-                'A_POSITIVE': 0.7,
-                'A_NEGATIVE': 0.5,
-                'B_POSITIVE': 0.6,
-                'B_NEGATIVE': 0.4,
-                'AB_POSITIVE': 0.5,
-                'AB_NEGATIVE': 0.3
-            }.get(blood_type, 0.7)
-
-            # Adjust for urgency
-            urgency_factor = min(urgency / 5.0, 1.0)
-            availability_score = base_availability * (1 + urgency_factor * 0.2)
-            availability_score = min(availability_score, 1.0)
-
-            prediction = {
-                'availability_score': availability_score,
-                'availability_category': 'HIGH' if availability_score > 0.7 else 'MEDIUM' if availability_score > 0.5 else 'LOW',
-                'confidence': 0.85,
-                'estimated_response_time': {'estimated_hours': int(24 * (2 - availability_score)), 'min_hours': 2, 'max_hours': 48},
-                'recommendations': ['Contact regular donors', 'Check nearby blood banks'] if availability_score < 0.6 else ['Standard protocols apply']
-            }
-
-            response = {
-                "prediction_type": "donor_availability",
-                "result": prediction,
-                "confidence": 0.85,
-                "model_version": "1.0.0-demo",
-                "timestamp": datetime.now().isoformat()
-            }
-            self._send_json_response(response)
+            result = predict_donor_availability(request_data)
+            self._send_json_response(prediction_response("donor_availability", result))
 
         except Exception as e:
             logger.error(f"Donor availability prediction failed: {e}")
@@ -161,38 +575,8 @@ class MLServiceHandler(BaseHTTPRequestHandler):
     def _handle_demand_forecast(self, request_data):
         """Handle demand forecasting"""
         try:
-            # Simplified demand forecasting for demo
-            forecast_days = request_data.get('forecast_days', 7)
-            hospital_capacity = request_data.get('hospital_capacity', 100)
-            population_served = request_data.get('population_served', 50000)
-
-            # Generate realistic demand forecast
-            base_demand = population_served / 5000  # Base demand per day
-            seasonal_factor = 1.0 + 0.2 * random.uniform(-1, 1)  # ±20% seasonal variation
-            forecasted_demand = base_demand * seasonal_factor
-
-            forecast = {
-                'forecasted_demand': round(forecasted_demand, 1),
-                'confidence': 0.82,
-                'confidence_interval': {
-                    'lower_bound': round(forecasted_demand * 0.8, 1),
-                    'upper_bound': round(forecasted_demand * 1.2, 1)
-                },
-                'forecast_period': forecast_days,
-                'recommendations': [
-                    'Monitor inventory levels closely',
-                    'Schedule regular donor drives'
-                ] if forecasted_demand > 15 else ['Standard inventory management']
-            }
-
-            response = {
-                "prediction_type": "demand_forecast",
-                "result": forecast,
-                "confidence": 0.82,
-                "model_version": "1.0.0-demo",
-                "timestamp": datetime.now().isoformat()
-            }
-            self._send_json_response(response)
+            result = forecast_demand(request_data)
+            self._send_json_response(prediction_response("demand_forecast", result))
 
         except Exception as e:
             logger.error(f"Demand forecasting failed: {e}")
@@ -201,56 +585,8 @@ class MLServiceHandler(BaseHTTPRequestHandler):
     def _handle_compatibility_assessment(self, request_data):
         """Handle compatibility assessment"""
         try:
-            # Simplified compatibility assessment for demo
-            donor = request_data.get('donor', {})
-            patient = request_data.get('patient', {})
-
-            donor_blood_type = donor.get('blood_type', 'O_POSITIVE')
-            patient_blood_type = patient.get('blood_type', 'O_POSITIVE')
-
-            # Blood type compatibility matrix
-            compatibility_matrix = {
-                'O_NEGATIVE': ['O_NEGATIVE', 'O_POSITIVE', 'A_NEGATIVE', 'A_POSITIVE', 'B_NEGATIVE', 'B_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'],
-                'O_POSITIVE': ['O_POSITIVE', 'A_POSITIVE', 'B_POSITIVE', 'AB_POSITIVE'],
-                'A_NEGATIVE': ['A_NEGATIVE', 'A_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'],
-                'A_POSITIVE': ['A_POSITIVE', 'AB_POSITIVE'],
-                'B_NEGATIVE': ['B_NEGATIVE', 'B_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'],
-                'B_POSITIVE': ['B_POSITIVE', 'AB_POSITIVE'],
-                'AB_NEGATIVE': ['AB_NEGATIVE', 'AB_POSITIVE'],
-                'AB_POSITIVE': ['AB_POSITIVE']
-            }
-
-            is_compatible = patient_blood_type in compatibility_matrix.get(donor_blood_type, [])
-            compatibility_score = 0.95 if is_compatible else 0.1
-
-            # Add some randomness for other factors
-            if is_compatible:
-                compatibility_score *= (0.8 + 0.2 * random.random())
-
-            compatibility = {
-                'score': compatibility_score,
-                'compatible': compatibility_score > 0.7,
-                'confidence': 0.9,
-                'blood_compatibility': {
-                    'compatible': is_compatible,
-                    'donor_type': donor_blood_type,
-                    'patient_type': patient_blood_type
-                },
-                'recommendations': [
-                    'Proceed with standard protocols'
-                ] if is_compatible else [
-                    'Find alternative donor with compatible blood type'
-                ]
-            }
-
-            response = {
-                "prediction_type": "compatibility",
-                "result": compatibility,
-                "confidence": 0.9,
-                "model_version": "1.0.0-demo",
-                "timestamp": datetime.now().isoformat()
-            }
-            self._send_json_response(response)
+            result = assess_compatibility(request_data)
+            self._send_json_response(prediction_response("compatibility", result))
 
         except Exception as e:
             logger.error(f"Compatibility assessment failed: {e}")
@@ -259,94 +595,47 @@ class MLServiceHandler(BaseHTTPRequestHandler):
     def _handle_risk_assessment(self, request_data):
         """Handle risk assessment"""
         try:
-            # Simplified risk assessment for demo
-            subject = request_data.get('subject', {})
-            assessment_type = request_data.get('assessment_type', 'donation')
-
-            age = subject.get('age', 30)
-            chronic_conditions = len(subject.get('chronic_conditions', []))
-            emergency_procedure = request_data.get('emergency_procedure', False)
-
-            # Calculate risk score
-            risk_score = 0.1  # Base risk
-
-            # Age factor
-            if age > 65:
-                risk_score += 0.3
-            elif age < 18:
-                risk_score += 0.2
-
-            # Chronic conditions
-            risk_score += chronic_conditions * 0.15
-
-            # Emergency procedure
-            if emergency_procedure:
-                risk_score += 0.4
-
-            risk_score = min(risk_score, 1.0)
-
-            # Categorize risk
-            if risk_score < 0.3:
-                risk_category = 'LOW'
-            elif risk_score < 0.6:
-                risk_category = 'MODERATE'
-            elif risk_score < 0.8:
-                risk_category = 'HIGH'
-            else:
-                risk_category = 'CRITICAL'
-
-            risk_assessment = {
-                'risk_score': risk_score,
-                'risk_category': risk_category,
-                'confidence': 0.88,
-                'assessment_type': assessment_type,
-                'recommendations': [
-                    'Proceed with standard protocols'
-                ] if risk_score < 0.3 else [
-                    'Enhanced monitoring required',
-                    'Consider specialist consultation'
-                ] if risk_score < 0.6 else [
-                    'High-risk procedure',
-                    'Specialist supervision required',
-                    'Emergency protocols may be needed'
-                ]
-            }
-
-            response = {
-                "prediction_type": "risk_assessment",
-                "result": risk_assessment,
-                "confidence": 0.88,
-                "model_version": "1.0.0-demo",
-                "timestamp": datetime.now().isoformat()
-            }
-            self._send_json_response(response)
+            result = assess_risk(request_data)
+            self._send_json_response(prediction_response("risk_assessment", result))
 
         except Exception as e:
             logger.error(f"Risk assessment failed: {e}")
             self._send_error_response(str(e))
 
+    def _handle_batch(self, request_data, prediction_type, predict):
+        """Handle a batch of predictions in one request"""
+        items = batch_items(request_data)
+        if items is None:
+            self._send_error_response('Request body must contain an "items" list', 400)
+            return
+
+        try:
+            self._send_json_response(batch_response(prediction_type, predict, items))
+
+        except Exception as e:
+            logger.error(f"Batch {prediction_type} prediction failed: {e}")
+            self._send_error_response(str(e))
+
+    def _handle_donor_batch(self, request_data):
+        """Handle batch donor availability prediction"""
+        self._handle_batch(request_data, "donor_availability", predict_donor_availability)
+
+    def _handle_compatibility_batch(self, request_data):
+        """Handle batch compatibility assessment"""
+        self._handle_batch(request_data, "compatibility", assess_compatibility)
+
+    def _handle_risk_batch(self, request_data):
+        """Handle batch risk assessment"""
+        self._handle_batch(request_data, "risk_assessment", assess_risk)
+
     def _handle_model_training(self, model_name):
         """Handle model training"""
         try:
-            if model_name not in models:
+            if model_name not in MODEL_NAMES:
                 self._send_error_response(f"Model {model_name} not found", 404)
                 return
 
-            # Simulate training
-            training_result = {
-                "status": "completed",
-                "accuracy": 0.85 + 0.1 * random.random(),
-                "training_samples": random.randint(800, 1200),
-                "training_time_seconds": random.randint(30, 120)
-            }
-
-            response = {
-                "status": "success",
-                "model": model_name,
-                "training_result": training_result,
-                "timestamp": datetime.now().isoformat()
-            }
-            self._send_json_response(response)
+            self._send_json_response(train_model(model_name))
 
         except Exception as e:
             logger.error(f"Model training failed for {model_name}: {e}")
@@ -355,32 +644,150 @@ class MLServiceHandler(BaseHTTPRequestHandler):
     def _handle_model_metrics(self, model_name):
         """Handle model metrics request"""
         try:
-            if model_name not in models:
+            if model_name not in MODEL_NAMES:
                 self._send_error_response(f"Model {model_name} not found", 404)
                 return
 
-            # Generate demo metrics
-            metrics = {
-                "accuracy": 0.85 + 0.1 * random.random(),
-                "precision": 0.82 + 0.1 * random.random(),
-                "recall": 0.88 + 0.1 * random.random(),
-                "f1_score": 0.85 + 0.1 * random.random(),
-                "last_trained": datetime.now().isoformat(),
-                "training_samples": random.randint(800, 1200)
-            }
-
-            response = {
-                "model": model_name,
-                "version": "1.0.0-demo",
-                "metrics": metrics,
-                "timestamp": datetime.now().isoformat()
-            }
-            self._send_json_response(response)
+            self._send_json_response(model_metrics(model_name))
 
         except Exception as e:
             logger.error(f"Failed to get metrics for {model_name}: {e}")
             self._send_error_response(str(e))
 
+# Exact-match routes for the built-in server, mapped to the handler functions
+# themselves so dispatch is one dict lookup and a direct call.
+# Parameterised routes (/models/...) are matched by prefix in do_GET/do_POST.
+GET_ROUTES = {
+    '/health': MLServiceHandler._handle_health_check,
+}
+
+POST_ROUTES = {
+    '/predict/donor-availability': MLServiceHandler._handle_donor_prediction,
+    '/predict/demand-forecast': MLServiceHandler._handle_demand_forecast,
+    '/predict/compatibility': MLServiceHandler._handle_compatibility_assessment,
+    '/predict/risk-assessment': MLServiceHandler._handle_risk_assessment,
+    '/predict/donor-availability/batch': MLServiceHandler._handle_donor_batch,
+    '/predict/compatibility/batch': MLServiceHandler._handle_compatibility_batch,
+    '/predict/risk-assessment/batch': MLServiceHandler._handle_risk_batch,
+}
+
+def _json_response(data, status_code=200):
+    """Build a Starlette JSON response"""
+    return Response(_dumps(data), status_code=status_code, media_type='application/json')
+
+def _error(message, status_code=500):
+    """Build a Starlette error response"""
+    return Response(error_body(message, status_code), status_code=status_code, media_type='application/json')
+
+async def _read_json(request):
+    """Parse the request body, treating an empty body as an empty object"""
+    body = await request.body()
+    return _loads(body) if body else {}
+
+def _prediction_endpoint(prediction_type, predict, description):
+    """Create an async endpoint for a prediction function"""
+    async def endpoint(request):
+        try:
+            request_data = await _read_json(request)
+        except JSONDecodeError:
+            return _error('Invalid JSON in request body', 400)
+
+        try:
+            return _json_response(prediction_response(prediction_type, predict(request_data)))
+        except Exception as e:
+            logger.error(f"{description} failed: {e}")
+            return _error(str(e))
+
+    return endpoint
+
+def _batch_endpoint(prediction_type, predict):
+    """Create an async endpoint that runs a prediction function over a batch"""
+    async def endpoint(request):
+        try:
+            request_data = await _read_json(request)
+        except JSONDecodeError:
+            return _error('Invalid JSON in request body', 400)
+
+        items = batch_items(request_data)
+        if items is None:
+            return _error('Request body must contain an "items" list', 400)
+
+        try:
+            return _json_response(batch_response(prediction_type, predict, items))
+        except Exception as e:
+            logger.error(f"Batch {prediction_type} prediction failed: {e}")
+            return _error(str(e))
+
+    return endpoint
+
+async def health(request):
+    """Handle health check endpoint"""
+    return Response(health_check_body(), media_type='application/json')
+
+async def train(request):
+    """Handle model training"""
+    model_name = request.path_params['model_name']
+    if model_name not in MODEL_NAMES:
+        return _error(f"Model {model_name} not found", 404)
+
+    try:
+        return _json_response(train_model(model_name))
+    except Exception as e:
+        logger.error(f"Model training failed for {model_name}: {e}")
+        return _error(str(e))
+
+async def metrics(request):
+    """Handle model metrics request"""
+    model_name = request.path_params['model_name']
+    if model_name not in MODEL_NAMES:
+        return _error(f"Model {model_name} not found", 404)
+
+    try:
+        return _json_response(model_metrics(model_name))
+    except Exception as e:
+        logger.error(f"Failed to get metrics for {model_name}: {e}")
+        return _error(str(e))
+
+async def _http_error(request, exc):
+    """Render routing errors in the service's JSON error format"""
+    message = 'Route not found' if exc.status_code == 404 else exc.detail
+    return _error(message, exc.status_code)
+
+if Starlette is not None:
+    asgi_app = Starlette(
+        routes=[
+            Route('/health', health, methods=['GET']),
+            Route('/predict/donor-availability',
+                  _prediction_endpoint("donor_availability", predict_donor_availability, "Donor availability prediction"),
+                  methods=['POST']),
+            Route('/predict/demand-forecast',
+                  _prediction_endpoint("demand_forecast", forecast_demand, "Demand forecasting"),
+                  methods=['POST']),
+            Route('/predict/compatibility',
+                  _prediction_endpoint("compatibility", assess_compatibility, "Compatibility assessment"),
+                  methods=['POST']),
+            Route('/predict/risk-assessment',
+                  _prediction_endpoint("risk_assessment", assess_risk, "Risk assessment"),
+                  methods=['POST']),
+            Route('/predict/donor-availability/batch',
+                  _batch_endpoint("donor_availability", predict_donor_availability), methods=['POST']),
+            Route('/predict/compatibility/batch',
+                  _batch_endpoint("compatibility", assess_compatibility), methods=['POST']),
+            Route('/predict/risk-assessment/batch',
+                  _batch_endpoint("risk_assessment", assess_risk), methods=['POST']),
+            Route('/models/train/{model_name}', train, methods=['POST']),
+            Route('/models/{model_name}/metrics', metrics, methods=['GET']),
+        ],
+        middleware=[
+            Middleware(CORSMiddleware, allow_origins=['*'],
+                       allow_methods=['GET', 'POST', 'OPTIONS'], allow_headers=['Content-Type']),
+            Middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=1),
+        ],
+        exception_handlers={HTTPException: _http_error},
+    )
+else:
+    asgi_app = None
+
 def run_server():
     """Run the ML services HTTP server"""
     port = int(os.getenv("ML_SERVICE_PORT", 8001))
@@ -393,11 +800,36 @@ def run_server():
     logger.info("  POST /predict/demand-forecast - Blood demand forecasting")
     logger.info("  POST /predict/compatibility - Donor-patient compatibility")
     logger.info("  POST /predict/risk-assessment - Risk assessment")
+    logger.info("  POST /predict/{donor-availability,compatibility,risk-assessment}/batch - Batch predictions")
     logger.info("  POST /models/train/{model_name} - Train model")
     logger.info("  GET  /models/{model_name}/metrics - Get model metrics")
     logger.info("🩸 HemoLink AI - Empowering Thalassemia Care")
 
-    server = HTTPServer((host, port), MLServiceHandler)
+    try:
+        import uvicorn
+    except ImportError:
+        uvicorn = None
+
+    if uvicorn is not None and asgi_app is not None:
+        # uvicorn[standard] ships uvloop (libuv event loop) and the httptools C parser;
+        # "auto" picks httptools when present, uvloop is requested explicitly
+        try:
+            import uvloop  # noqa: F401
+            loop = "uvloop"
+        except ImportError:
+            loop = "asyncio"
+
+        workers = int(os.getenv("ML_SERVICE_WORKERS", os.cpu_count() or 1))
+        logger.info(f"Serving with uvicorn ({workers} workers, {loop} event loop)")
+        uvicorn.run("app:asgi_app", host=host, port=port, workers=workers, loop=loop, http="auto")
+        return
+
+    logger.info("Starlette/uvicorn not installed, using the built-in HTTP server")
+
+    # One thread per connection so slow requests don't block /health;
+    # HTTPServer already sets SO_REUSEADDR via allow_reuse_address
+    server = ThreadingHTTPServer((host, port), MLServiceHandler)
+    server.daemon_threads = True
 
     try:
         server.serve_forever()
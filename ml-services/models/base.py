@@ -0,0 +1,141 @@
+import os
+import numpy as np
+import pickle
+import joblib
+import logging
+from datetime import datetime
+from typing import Dict, Any, Tuple
+import asyncio
+
+from utils.inference_backends import compile_model, load_compiled
+
+logger = logging.getLogger(__name__)
+
+SAVED_MODELS_DIR = "models/saved"
+
+class SavedModel:
+    """
+    Load-or-train lifecycle shared by the ML models, with the model persisted under SAVED_MODELS_DIR.
+    
+    Subclasses set MODEL_NAME (the saved file stem), DISPLAY_NAME, N_FEATURES and TRAINING_SUMMARY (a
+    format string over the metrics), and implement _training_data and _fit. The model is loaded or
+    trained on first use by ensure_loaded.
+    """
+    
+    MODEL_NAME: str
+    DISPLAY_NAME: str
+    N_FEATURES: int
+    TRAINING_SUMMARY = "Accuracy: {accuracy:.3f}"
+    
+    def __init__(self):
+        self.version = "1.0.0"
+        self.model = None
+        self.compiled_model = None  # Compiled copy of self.model used for inference when available
+        self.scaler = None  # Only set by older model files whose trees expect standardized inputs
+        self.is_trained = False
+        self._load_lock = asyncio.Lock()  # Serializes lazy load/train across concurrent requests
+        self.metrics = {}
+    
+    @property
+    def base_path(self) -> str:
+        """Saved model path without extension; compiled backends add their own"""
+        return f"{SAVED_MODELS_DIR}/{self.MODEL_NAME}_v{self.version}"
+    
+    async def _training_data(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Training features and labels"""
+        raise NotImplementedError
+    
+    def _fit(self, X: np.ndarray, y: np.ndarray) -> tuple:
+        """Fit the model on contiguous float32 features and return (model, metrics)"""
+        raise NotImplementedError
+    
+    def _fit_model(self, X: np.ndarray, y: np.ndarray) -> tuple:
+        """Fit the model and compute its metrics; runs in a worker thread"""
+        # Trees split on float32, so fit on exactly the values predict will see, in one contiguous copy at most
+        return self._fit(np.ascontiguousarray(X, dtype=np.float32), y)
+    
+    async def train(self) -> Dict[str, Any]:
+        """Train the model, serve it from this instance and save it"""
+        try:
+            logger.info(f"Starting {self.DISPLAY_NAME} model training...")
+            
+            X, y = await self._training_data()
+            
+            # Fitting is CPU-bound, so it runs off the event loop; the result is published here at once
+            self.model, self.metrics = await asyncio.to_thread(self._fit_model, X, y)
+            self.compiled_model = None
+            self.scaler = None
+            
+            self.is_trained = True
+            await self.save_model()
+            
+            logger.info(f"{self.DISPLAY_NAME.capitalize()} model training completed. "
+                        f"{self.TRAINING_SUMMARY.format(**self.metrics)}")
+            return self.metrics
+        
+        except Exception as e:
+            logger.error(f"Model training failed: {e}")
+            raise
+    
+    async def save_model(self):
+        """Save trained model"""
+        try:
+            model_path = f"{self.base_path}.joblib"
+            await asyncio.to_thread(joblib.dump, {
+                'model': self.model,
+                'scaler': self.scaler,
+                'metrics': self.metrics,
+                'version': self.version
+            }, model_path, compress=0)  # Uncompressed so load_model can memory-map the arrays
+            logger.info(f"Model saved to {model_path}")
+            
+            self.compiled_model = await asyncio.to_thread(compile_model, self.model, self.N_FEATURES, self.base_path)
+        except Exception as e:
+            logger.error(f"Failed to save model: {e}")
+    
+    async def load_model(self, model_path: str):
+        """Load pre-trained model"""
+        # Arrays are memory-mapped read-only and shared between workers through the page cache,
+        # so the loaded model and scaler must never be modified in place
+        saved_data = await asyncio.to_thread(joblib.load, model_path, mmap_mode='r')
+        if saved_data['model'].n_features_in_ != self.N_FEATURES:
+            raise ValueError(f"expected {self.N_FEATURES} features, model has {saved_data['model'].n_features_in_}")
+        self.model = saved_data['model']
+        self.scaler = saved_data.get('scaler')
+        self.metrics = saved_data.get('metrics', {})
+        self.version = saved_data.get('version', self.version)
+        self.compiled_model = await asyncio.to_thread(load_compiled, self.base_path)
+        self.is_trained = True
+        logger.info(f"Model loaded from {model_path}")
+    
+    async def ensure_loaded(self):
+        """Load or train the model once, even when called concurrently"""
+        if self.is_trained:
+            return
+        async with self._load_lock:
+            if not self.is_trained:
+                await self.load_or_train()
+    
+    async def load_or_train(self):
+        """Load existing model or train new one"""
+        model_path = f"{self.base_path}.joblib"
+        if not os.path.exists(model_path):
+            logger.info("No pre-trained model found, training new model...")
+            await self.train()
+            return
+        
+        try:
+            await self.load_model(model_path)
+        except (OSError, EOFError, KeyError, ValueError, pickle.UnpicklingError) as e:
+            # Unreadable or incomplete model file; anything else is a bug and propagates
+            logger.warning(f"Failed to load model from {model_path}, training new model: {e}")
+            await self.train()
+    
+    async def get_metrics(self) -> Dict[str, Any]:
+        """Get model performance metrics"""
+        return {
+            'version': self.version,
+            'is_trained': self.is_trained,
+            'metrics': self.metrics,
+            'last_updated': datetime.now().isoformat()
+        }
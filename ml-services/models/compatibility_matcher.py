@@ -1,17 +1,82 @@
+import math
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import ExtraTreesClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, precision_score, recall_score
-import joblib
 import logging
-from datetime import datetime
 from typing import Dict, List, Any, Optional
 import asyncio
 
+from models.base import SavedModel
+from utils.blood_types import BLOOD_TYPES, COMPAT_MASK, compatible_mask, encode_blood_types, to_blood_type_code
+from utils.feature_engineering import gather_column
+from utils.inference_backends import fold_scaler, standardize
+
+# cachetools is optional; without it repeated assessments are not cached
+try:
+    from cachetools import TTLCache
+except ImportError:
+    TTLCache = None
+
+# Numba is optional; without it the feature kernel below runs as plain Python
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
 logger = logging.getLogger(__name__)
 
-class CompatibilityMatcher:
+# Number of model features: age, geography, donor health, patient condition,
+# medications, timing, donor reliability and urgency
+N_FEATURES = 8
+
+EARTH_RADIUS_KM = 6371.0
+MAX_DISTANCE_KM = 100.0  # Pairs this far apart or more get a geographic score of 0
+
+MIN_DONOR_AGE = 18  # Younger donors need a guardian_consent flag
+VALID_URGENCY_LEVELS = range(1, 6)  # UrgencyLevel.ROUTINE .. UrgencyLevel.EMERGENCY
+
+def _features_kernel(donor_age, patient_age, donor_lat, donor_lon, patient_lat, patient_lon,
+                     health, severity, conflicting_meds, urgency, available_hours, reliability):
+    """Compute the (N, N_FEATURES) feature matrix from per-pair columns in a single pass"""
+    n = donor_age.shape[0]
+    # float32 like the training matrix, so predict_proba needs no converted copy
+    features = np.empty((n, N_FEATURES), dtype=np.float32)
+    for i in prange(n):
+        # Age compatibility
+        features[i, 0] = max(0.0, 1.0 - abs(donor_age[i] - patient_age[i]) / 50.0)
+        
+        # Geographic proximity from great-circle (Haversine) distance; closer = higher
+        lat1 = math.radians(donor_lat[i])
+        lat2 = math.radians(patient_lat[i])
+        a = (math.sin((lat2 - lat1) / 2) ** 2 +
+             math.cos(lat1) * math.cos(lat2) * math.sin(math.radians(patient_lon[i] - donor_lon[i]) / 2) ** 2)
+        distance_km = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+        features[i, 1] = max(0.0, 1.0 - distance_km / MAX_DISTANCE_KM)
+        
+        # Medical history compatibility
+        features[i, 2] = health[i]
+        features[i, 3] = 1.0 - severity[i]
+        features[i, 4] = max(0.0, 1.0 - conflicting_meds[i] * 0.2)
+        
+        # Timing: higher urgency requires higher donor availability
+        if urgency[i] >= 4:  # Emergency
+            features[i, 5] = 1.0 if available_hours[i] >= 2 else 0.3
+        elif urgency[i] >= 2:  # Urgent
+            features[i, 5] = 1.0 if available_hours[i] >= 8 else 0.7
+        else:  # Regular
+            features[i, 5] = 0.9
+        
+        # Donor reliability score and urgency factor
+        features[i, 6] = reliability[i]
+        features[i, 7] = urgency[i] / 5.0
+    return features
+
+if njit is not None:
+    _features_kernel = njit(parallel=True, fastmath=True, cache=True)(_features_kernel)
+
+class CompatibilityMatcher(SavedModel):
     """
     Machine Learning model to assess compatibility between donors and patients based on:
     - Blood type compatibility
@@ -21,184 +86,190 @@ class CompatibilityMatcher:
     - Risk factors
     """
     
-    def __init__(self):
-        self.version = "1.0.0"
-        self.model = None
-        self.scaler = StandardScaler()
-        self.is_trained = False
-        self.metrics = {}
-        self.blood_compatibility_matrix = self._create_compatibility_matrix()
-        
-    def _create_compatibility_matrix(self) -> Dict[str, List[str]]:
-        """Create blood type compatibility matrix"""
-        return {
-            'O_NEGATIVE': ['O_NEGATIVE', 'O_POSITIVE', 'A_NEGATIVE', 'A_POSITIVE', 
-                          'B_NEGATIVE', 'B_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'],
-            'O_POSITIVE': ['O_POSITIVE', 'A_POSITIVE', 'B_POSITIVE', 'AB_POSITIVE'],
-            'A_NEGATIVE': ['A_NEGATIVE', 'A_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'],
-            'A_POSITIVE': ['A_POSITIVE', 'AB_POSITIVE'],
-            'B_NEGATIVE': ['B_NEGATIVE', 'B_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'],
-            'B_POSITIVE': ['B_POSITIVE', 'AB_POSITIVE'],
-            'AB_NEGATIVE': ['AB_NEGATIVE', 'AB_POSITIVE'],
-            'AB_POSITIVE': ['AB_POSITIVE']
-        }
+    MODEL_NAME = "compatibility_matcher"
+    DISPLAY_NAME = "compatibility matching"
+    N_FEATURES = N_FEATURES
     
+    def __init__(self, n_estimators: int = 30, max_depth: int = 6, min_samples_leaf: int = 20):
+        super().__init__()
+        # Small, shallow trees keep per-prediction node visits low on this 8-10 feature problem
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        # Packed uint8 recipient bitmask per donor type (see utils.blood_types)
+        self.blood_compatibility_matrix = COMPAT_MASK
+        # Recent assessments keyed on (donor id, patient id, donor type, patient type, urgency level), cleared on retraining
+        self._cache = TTLCache(maxsize=10_000, ttl=300) if TTLCache is not None else None
+        self._cache_locks: Dict[tuple, asyncio.Lock] = {}  # One lock per key being computed
+        
     async def assess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Assess compatibility between donor and patient"""
+        """Assess compatibility between donor and patient, reusing recent results for the same pair"""
         try:
-            if not self.is_trained:
-                await self.load_or_train()
+            key = self._cache_key(input_data)
+            if key is None:
+                results = await self.assess_batch([input_data])
+                return results[0]
             
-            # Extract donor and patient data
-            donor_data = input_data.get('donor', {})
-            patient_data = input_data.get('patient', {})
+            result = self._cache.get(key)
+            if result is None:
+                # Concurrent misses on the same pair wait for the first one instead of rescoring it
+                lock = self._cache_locks.setdefault(key, asyncio.Lock())
+                try:
+                    async with lock:
+                        result = self._cache.get(key)
+                        if result is None:
+                            results = await self.assess_batch([input_data])
+                            result = self._cache[key] = results[0]
+                finally:
+                    # Also on failure, so a pair that keeps failing doesn't leave its lock behind
+                    self._cache_locks.pop(key, None)
             
-            # Check blood type compatibility
-            blood_compatibility = self._check_blood_compatibility(
-                donor_data.get('blood_type'), 
-                patient_data.get('blood_type')
-            )
+            return dict(result)
             
-            if not blood_compatibility['compatible']:
-                return {
-                    'score': 0.0,
-                    'compatible': False,
-                    'reason': 'Blood type incompatibility',
-                    'blood_compatibility': blood_compatibility,
-                    'recommendations': ['Find alternative donor with compatible blood type']
-                }
+        except Exception as e:
+            logger.error(f"Compatibility assessment failed: {e}")
+            raise
+    
+    async def assess_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Assess a batch of donor-patient pairs with a single model call"""
+        try:
+            await self.ensure_loaded()
             
-            # Prepare features for ML assessment
-            features = await self.prepare_features(input_data)
+            results = [None] * len(inputs)
+            compatible_rows = []
             
-            # Scale features
-            features_scaled = self.scaler.transform(features)
+            # Blood type incompatibility rules a pair out before the model runs. Types (names or
+            # BloodTypeCode values) are encoded once, then checked for the whole batch with integer ops
+            donor_codes = encode_blood_types([input_data.get('donor', {}).get('blood_type') for input_data in inputs])
+            patient_codes = encode_blood_types([input_data.get('patient', {}).get('blood_type') for input_data in inputs])
+            compatible = compatible_mask(donor_codes, patient_codes)
             
-            # Make prediction
-            compatibility_prob = self.model.predict_proba(features_scaled)[0]
-            compatibility_score = compatibility_prob[1]  # Probability of compatibility
+            for i in range(len(inputs)):
+                blood_compatibility = self._check_blood_compatibility(
+                    int(donor_codes[i]),
+                    int(patient_codes[i]),
+                    bool(compatible[i])
+                )
+                
+                if not blood_compatibility['compatible']:
+                    results[i] = {
+                        'score': 0.0,
+                        'compatible': False,
+                        'reason': 'Blood type incompatibility',
+                        'blood_compatibility': blood_compatibility,
+                        'recommendations': ['Find alternative donor with compatible blood type']
+                    }
+                    continue
+                
+                # Other cheap eligibility checks also run before any feature work
+                rejection = self._screen_pair(inputs[i], blood_compatibility)
+                if rejection is not None:
+                    results[i] = rejection
+                else:
+                    compatible_rows.append((i, blood_compatibility))
             
-            # Generate detailed assessment
-            assessment = {
-                'score': float(compatibility_score),
-                'compatible': compatibility_score > 0.7,
-                'confidence': float(max(compatibility_prob) - min(compatibility_prob)),
-                'blood_compatibility': blood_compatibility,
-                'risk_factors': self._assess_risk_factors(donor_data, patient_data),
-                'geographic_score': self._calculate_geographic_score(donor_data, patient_data),
-                'timing_score': self._calculate_timing_score(input_data),
-                'recommendations': self._generate_recommendations(compatibility_score, input_data)
-            }
+            if not compatible_rows:
+                return results
             
-            return assessment
+            # Prepare, scale and score all remaining pairs at once
+            features = await self.prepare_features([inputs[i] for i, _ in compatible_rows])
+            # Reported as-is, so taken out before a legacy scaler standardizes features in place
+            geographic_scores = features[:, 1].tolist()
+            timing_scores = features[:, 5].tolist()
+            features_scaled = standardize(features, self.scaler)
+            predictor = self.compiled_model or self.model
+            compatibility_probs = predictor.predict_proba(features_scaled)
+            
+            for row, (i, blood_compatibility) in enumerate(compatible_rows):
+                input_data = inputs[i]
+                compatibility_prob = compatibility_probs[row]
+                compatibility_score = compatibility_prob[1]  # Probability of compatibility
+                
+                results[i] = {
+                    'score': float(compatibility_score),
+                    'compatible': bool(compatibility_score > 0.7),
+                    'confidence': float(max(compatibility_prob) - min(compatibility_prob)),
+                    'blood_compatibility': blood_compatibility,
+                    'risk_factors': self._assess_risk_factors(input_data.get('donor', {}), input_data.get('patient', {})),
+                    'geographic_score': geographic_scores[row],
+                    'timing_score': timing_scores[row],
+                    'recommendations': self._generate_recommendations(compatibility_score, input_data)
+                }
+            
+            return results
             
         except Exception as e:
-            logger.error(f"Compatibility assessment failed: {e}")
+            logger.error(f"Batch compatibility assessment failed: {e}")
             raise
     
-    def _check_blood_compatibility(self, donor_type: str, patient_type: str) -> Dict[str, Any]:
-        """Check blood type compatibility"""
-        if not donor_type or not patient_type:
-            return {'compatible': False, 'reason': 'Missing blood type information'}
+    def _cache_key(self, input_data: Dict[str, Any]) -> Optional[tuple]:
+        """Cache key for an assessment, or None when caching is unavailable or a party has no id.
+        The blood types are part of the key, so correcting either record's type is never answered from cache"""
+        if self._cache is None:
+            return None
+        donor = input_data.get('donor', {})
+        patient = input_data.get('patient', {})
+        donor_id = donor.get('donor_id', donor.get('id'))
+        patient_id = patient.get('patient_id', patient.get('id'))
+        if donor_id is None or patient_id is None:
+            return None
+        return (donor_id, patient_id,
+                to_blood_type_code(donor.get('blood_type')), to_blood_type_code(patient.get('blood_type')),
+                input_data.get('urgency_level', 1))
+    
+    def _screen_pair(self, input_data: Dict[str, Any], blood_compatibility: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Reject a blood-compatible pair that fails a constant-time eligibility check, or return None"""
+        reason = None
+        donor = input_data.get('donor', {})
         
-        compatible_recipients = self.blood_compatibility_matrix.get(donor_type, [])
-        is_compatible = patient_type in compatible_recipients
+        donor_age = donor.get('age')
+        if donor_age is not None and donor_age < MIN_DONOR_AGE and not donor.get('guardian_consent'):
+            reason = 'Donor below minimum age without guardian consent'
+        elif input_data.get('urgency_level', 1) not in VALID_URGENCY_LEVELS:
+            reason = 'Invalid urgency level'
         
+        if reason is None:
+            return None
         return {
-            'compatible': is_compatible,
-            'donor_type': donor_type,
-            'patient_type': patient_type,
-            'compatibility_level': 'PERFECT' if donor_type == patient_type else 'COMPATIBLE' if is_compatible else 'INCOMPATIBLE'
+            'score': 0.0,
+            'compatible': False,
+            'reason': reason,
+            'blood_compatibility': blood_compatibility,
+            'recommendations': ['Find alternative donor meeting eligibility requirements']
         }
     
-    async def prepare_features(self, data: Dict[str, Any]) -> np.ndarray:
-        """Prepare features for compatibility assessment"""
-        donor_data = data.get('donor', {})
-        patient_data = data.get('patient', {})
-        
-        features = []
-        
-        # Blood type compatibility score
-        blood_compat = self._check_blood_compatibility(
-            donor_data.get('blood_type'), 
-            patient_data.get('blood_type')
-        )
-        features.append(1.0 if blood_compat['compatible'] else 0.0)
-        
-        # Age compatibility
-        donor_age = donor_data.get('age', 30)
-        patient_age = patient_data.get('age', 30)
-        age_diff = abs(donor_age - patient_age)
-        features.append(max(0, 1 - age_diff / 50))  # Normalize age difference
-        
-        # Geographic proximity
-        features.append(self._calculate_geographic_score(donor_data, patient_data))
-        
-        # Medical history compatibility
-        features.extend(self._extract_medical_features(donor_data, patient_data))
-        
-        # Timing features
-        features.append(self._calculate_timing_score(data))
-        
-        # Donor reliability score
-        features.append(donor_data.get('reliability_score', 0.8))
-        
-        # Urgency factor
-        features.append(data.get('urgency_level', 1) / 5.0)
+    def _check_blood_compatibility(self, donor_code: int, patient_code: int, is_compatible: bool) -> Dict[str, Any]:
+        """Describe blood type compatibility from encoded types and the bitmask test result for the pair"""
+        if donor_code < 0 or patient_code < 0:
+            return {'compatible': False, 'reason': 'Missing or unknown blood type information'}
         
-        return np.array(features).reshape(1, -1)
-    
-    def _calculate_geographic_score(self, donor_data: Dict, patient_data: Dict) -> float:
-        """Calculate geographic proximity score"""
-        try:
-            donor_lat = donor_data.get('latitude', 0)
-            donor_lon = donor_data.get('longitude', 0)
-            patient_lat = patient_data.get('latitude', 0)
-            patient_lon = patient_data.get('longitude', 0)
-            
-            # Simple distance calculation (in practice, use proper geospatial libraries)
-            distance = np.sqrt((donor_lat - patient_lat)**2 + (donor_lon - patient_lon)**2)
-            
-            # Convert to score (closer = higher score)
-            max_distance = 1.0  # Adjust based on your geographic scale
-            score = max(0, 1 - distance / max_distance)
-            return score
-        except:
-            return 0.5  # Default score if location data is missing
-    
-    def _calculate_timing_score(self, data: Dict[str, Any]) -> float:
-        """Calculate timing compatibility score"""
-        try:
-            urgency = data.get('urgency_level', 1)
-            donor_availability = data.get('donor', {}).get('available_hours', 24)
-            
-            # Higher urgency requires higher availability
-            if urgency >= 4:  # Emergency
-                return 1.0 if donor_availability >= 2 else 0.3
-            elif urgency >= 2:  # Urgent
-                return 1.0 if donor_availability >= 8 else 0.7
-            else:  # Regular
-                return 0.9
-        except:
-            return 0.8
+        return {
+            'compatible': is_compatible,
+            'donor_type': BLOOD_TYPES[donor_code],
+            'patient_type': BLOOD_TYPES[patient_code],
+            'compatibility_level': 'PERFECT' if donor_code == patient_code else 'COMPATIBLE' if is_compatible else 'INCOMPATIBLE'
+        }
     
-    def _extract_medical_features(self, donor_data: Dict, patient_data: Dict) -> List[float]:
-        """Extract medical compatibility features"""
-        features = []
-        
-        # Donor health status
-        features.append(donor_data.get('health_score', 0.9))
+    async def prepare_features(self, inputs: List[Dict[str, Any]]) -> np.ndarray:
+        """Prepare an (N, N_FEATURES) feature matrix for blood-compatible pairs"""
+        donors = [data.get('donor', {}) for data in inputs]
+        patients = [data.get('patient', {}) for data in inputs]
         
-        # Patient condition severity
-        features.append(1 - patient_data.get('condition_severity', 0.3))
+        conflicting_meds = np.array([
+            _count_shared_medications(donor.get('medications'), patient.get('medications'))
+            for donor, patient in zip(donors, patients)
+        ], dtype=np.float64)
         
-        # Medication compatibility
-        donor_meds = set(donor_data.get('medications', []))
-        patient_meds = set(patient_data.get('medications', []))
-        conflicting_meds = len(donor_meds.intersection(patient_meds))
-        features.append(max(0, 1 - conflicting_meds * 0.2))
-        
-        return features
+        # Dict parsing stays in Python; the arithmetic, including distances, runs in the compiled kernel
+        return _features_kernel(
+            gather_column(donors, 'age', 30), gather_column(patients, 'age', 30),
+            gather_column(donors, 'latitude', 0), gather_column(donors, 'longitude', 0),
+            gather_column(patients, 'latitude', 0), gather_column(patients, 'longitude', 0),
+            gather_column(donors, 'health_score', 0.9), gather_column(patients, 'condition_severity', 0.3),
+            conflicting_meds,
+            gather_column(inputs, 'urgency_level', 1), gather_column(donors, 'available_hours', 24),
+            gather_column(donors, 'reliability_score', 0.8)
+        )
     
     def _assess_risk_factors(self, donor_data: Dict, patient_data: Dict) -> List[str]:
         """Assess potential risk factors"""
@@ -249,101 +320,72 @@ class CompatibilityMatcher:
         return recommendations
     
     async def train(self) -> Dict[str, Any]:
-        """Train the compatibility matching model"""
-        try:
-            logger.info("Starting compatibility matching model training...")
-            
-            # Generate synthetic training data
-            training_data = self._generate_synthetic_data(1000)
-            
-            # Prepare features and labels
-            X, y = await self._prepare_training_data(training_data)
-            
-            # Scale features
-            X_scaled = self.scaler.fit_transform(X)
-            
-            # Train model
-            self.model = RandomForestClassifier(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42,
-                n_jobs=-1
-            )
-            
-            self.model.fit(X_scaled, y)
-            
-            # Calculate metrics
-            y_pred = self.model.predict(X_scaled)
-            self.metrics = {
-                'accuracy': accuracy_score(y, y_pred),
-                'precision': precision_score(y, y_pred, average='weighted'),
-                'recall': recall_score(y, y_pred, average='weighted'),
-                'training_samples': len(X)
-            }
-            
-            self.is_trained = True
-            await self.save_model()
-            
-            logger.info(f"Compatibility matching model training completed. Accuracy: {self.metrics['accuracy']:.3f}")
-            return self.metrics
-            
-        except Exception as e:
-            logger.error(f"Model training failed: {e}")
-            raise
+        """Train the compatibility matching model, dropping assessments cached from the previous one"""
+        metrics = await super().train()
+        if self._cache is not None:
+            self._cache.clear()
+        return metrics
+    
+    async def _training_data(self) -> tuple:
+        """Synthetic training features and labels"""
+        return await self._prepare_training_data(self._generate_synthetic_data(1000))
     
-    def _generate_synthetic_data(self, n_samples: int) -> pd.DataFrame:
-        """Generate synthetic training data"""
+    def _fit(self, X: np.ndarray, y: np.ndarray) -> tuple:
+        """Fit the forest and compute training metrics"""
+        # Scale features
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        
+        # Train model
+        model = ExtraTreesClassifier(
+            n_estimators=self.n_estimators,
+            max_depth=self.max_depth,
+            min_samples_leaf=self.min_samples_leaf,
+            random_state=42,
+            n_jobs=-1
+        )
+        
+        model.fit(X_scaled, y)
+        
+        # Calculate metrics
+        y_pred = model.predict(X_scaled)
+        metrics = {
+            'accuracy': accuracy_score(y, y_pred),
+            'precision': precision_score(y, y_pred, average='weighted', zero_division=0),
+            'recall': recall_score(y, y_pred, average='weighted'),
+            'training_samples': len(X)
+        }
+        
+        # Move the scaling into the split thresholds so inference skips it
+        fold_scaler(model, scaler)
+        return model, metrics
+    
+    def _generate_synthetic_data(self, n_samples: int) -> Dict[str, np.ndarray]:
+        """Generate synthetic training data as column arrays"""
         np.random.seed(42)
         
         data = {
             'blood_compatible': np.random.binomial(1, 0.8, n_samples),
             'age_diff': np.random.exponential(10, n_samples),
-            'distance': np.random.exponential(20, n_samples),
+            'donor_latitude': np.random.uniform(8, 35, n_samples),
+            'donor_longitude': np.random.uniform(68, 97, n_samples),
+            'patient_latitude': np.random.uniform(8, 35, n_samples),
+            'patient_longitude': np.random.uniform(68, 97, n_samples),
             'urgency': np.random.randint(1, 6, n_samples),
             'successful_match': np.random.binomial(1, 0.75, n_samples)
         }
         
-        return pd.DataFrame(data)
+        return data
     
-    async def _prepare_training_data(self, data: pd.DataFrame) -> tuple:
+    async def _prepare_training_data(self, data: Dict[str, np.ndarray]) -> tuple:
         """Prepare training data"""
-        X = np.random.random((len(data), 8))  # 8 features
-        y = data['successful_match'].values
+        y = data['successful_match']
+        X = np.random.random((len(y), N_FEATURES)).astype(np.float32)
         return X, y
-    
-    async def save_model(self):
-        """Save trained model"""
-        try:
-            model_path = f"models/saved/compatibility_matcher_v{self.version}.joblib"
-            joblib.dump({
-                'model': self.model,
-                'scaler': self.scaler,
-                'metrics': self.metrics,
-                'version': self.version
-            }, model_path)
-            logger.info(f"Model saved to {model_path}")
-        except Exception as e:
-            logger.error(f"Failed to save model: {e}")
-    
-    async def load_or_train(self):
-        """Load existing model or train new one"""
-        try:
-            model_path = f"models/saved/compatibility_matcher_v{self.version}.joblib"
-            saved_data = joblib.load(model_path)
-            self.model = saved_data['model']
-            self.scaler = saved_data['scaler']
-            self.metrics = saved_data.get('metrics', {})
-            self.is_trained = True
-            logger.info(f"Model loaded from {model_path}")
-        except:
-            logger.info("No pre-trained model found, training new model...")
-            await self.train()
-    
-    async def get_metrics(self) -> Dict[str, Any]:
-        """Get model performance metrics"""
-        return {
-            'version': self.version,
-            'is_trained': self.is_trained,
-            'metrics': self.metrics,
-            'last_updated': datetime.now().isoformat()
-        }
+
+def _count_shared_medications(donor_meds: Optional[List[str]], patient_meds: Optional[List[str]]) -> int:
+    """Number of distinct medications on both lists"""
+    # Most people list no medications, so skip building sets entirely in that case
+    if not donor_meds or not patient_meds:
+        return 0
+    return len(set(donor_meds).intersection(patient_meds))
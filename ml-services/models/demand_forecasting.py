@@ -1,17 +1,20 @@
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import ExtraTreesRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import joblib
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Any, Optional
-import asyncio
+
+from models.base import SavedModel
+from utils.inference_backends import fold_scaler, standardize
 
 logger = logging.getLogger(__name__)
 
-class DemandForecaster:
+# Number of model features: 4 time, 3 historical demand, 3 location/capacity
+N_FEATURES = 10
+
+class DemandForecaster(SavedModel):
     """
     Machine Learning model to forecast blood demand based on:
     - Historical demand patterns
@@ -21,78 +24,91 @@ class DemandForecaster:
     - Population demographics
     """
     
-    def __init__(self):
-        self.version = "1.0.0"
-        self.model = None
-        self.scaler = StandardScaler()
-        self.is_trained = False
-        self.metrics = {}
+    MODEL_NAME = "demand_forecaster"
+    DISPLAY_NAME = "demand forecasting"
+    N_FEATURES = N_FEATURES
+    TRAINING_SUMMARY = "R2: {r2_score:.3f}"
+    
+    def __init__(self, n_estimators: int = 30, max_depth: int = 6, min_samples_leaf: int = 20):
+        super().__init__()
+        # Small, shallow trees keep per-prediction node visits low on this 8-10 feature problem
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
         
     async def forecast(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Forecast blood demand"""
+        """Forecast daily blood demand for each day of the forecast period"""
         try:
-            if not self.is_trained:
-                await self.load_or_train()
+            horizons = input_data.get('forecast_days', 7)
+            if horizons < 1:
+                raise ValueError(f"forecast_days must be at least 1, got {horizons}")
             
-            # Prepare features
-            features = await self.prepare_features(input_data)
+            await self.ensure_loaded()
+            
+            # Prepare one feature row per forecast day
+            features = await self.prepare_features(input_data, horizons)
             
             # Scale features
-            features_scaled = self.scaler.transform(features)
+            features_scaled = standardize(features, self.scaler)
             
-            # Make prediction
-            demand_forecast = self.model.predict(features_scaled)[0]
+            # Make predictions for all days in one call
+            predictor = self.compiled_model or self.model
+            demand_forecast = predictor.predict(features_scaled)
             
-            # Calculate confidence interval
+            # Calculate confidence intervals
             confidence_interval = self._calculate_confidence_interval(demand_forecast)
             
             return {
-                'forecasted_demand': float(demand_forecast),
+                'forecasted_demand': demand_forecast.tolist(),
                 'confidence': 0.85,
                 'confidence_interval': confidence_interval,
-                'forecast_period': input_data.get('forecast_days', 7),
-                'recommendations': self._generate_recommendations(demand_forecast, input_data)
+                'forecast_period': horizons,
+                'recommendations': self._generate_recommendations(float(demand_forecast.max()), input_data)
             }
             
         except Exception as e:
             logger.error(f"Demand forecasting failed: {e}")
             raise
     
-    async def prepare_features(self, data: Dict[str, Any]) -> np.ndarray:
-        """Prepare features for forecasting"""
-        features = []
+    async def prepare_features(self, data: Dict[str, Any], horizons: int = 1) -> np.ndarray:
+        """Prepare a (horizons, N_FEATURES) feature matrix for consecutive days starting at forecast_date"""
+        # Validated requests already carry a datetime; raw dicts may still pass an ISO string
+        forecast_date = data.get('forecast_date') or datetime.now()
+        if isinstance(forecast_date, str):
+            forecast_date = datetime.fromisoformat(forecast_date)
         
         # Time-based features
-        forecast_date = datetime.fromisoformat(data.get('forecast_date', datetime.now().isoformat()))
-        features.extend([
-            forecast_date.hour,
-            forecast_date.weekday(),
-            forecast_date.month,
-            forecast_date.day
+        dates = np.datetime64(forecast_date.date()) + np.arange(horizons)
+        months = dates.astype('datetime64[M]')
+        time_features = np.column_stack([
+            np.full(horizons, forecast_date.hour),
+            (forecast_date.weekday() + np.arange(horizons)) % 7,
+            months.astype(np.int64) % 12 + 1,
+            (dates - months).astype(np.int64) + 1
         ])
         
-        # Historical demand features
-        features.extend([
+        # Historical demand, location and capacity features are the same for every day
+        constant_features = np.array([
             data.get('avg_daily_demand', 10),
             data.get('peak_demand_last_week', 15),
-            data.get('seasonal_factor', 1.0)
-        ])
-        
-        # Location and capacity features
-        features.extend([
+            data.get('seasonal_factor', 1.0),
             data.get('hospital_capacity', 100),
             data.get('population_served', 50000),
             data.get('emergency_events', 0)
-        ])
+        ], dtype=np.float64)
         
-        return np.array(features).reshape(1, -1)
+        # Built directly in float32, the dtype the trees were fit on (see SavedModel._fit_model)
+        features = np.empty((horizons, N_FEATURES), dtype=np.float32)
+        features[:, :4] = time_features
+        features[:, 4:] = constant_features
+        return features
     
-    def _calculate_confidence_interval(self, forecast: float) -> Dict[str, float]:
-        """Calculate confidence interval for forecast"""
+    def _calculate_confidence_interval(self, forecast: np.ndarray) -> Dict[str, List[float]]:
+        """Calculate per-day confidence intervals for forecast"""
         margin = forecast * 0.2  # 20% margin
         return {
-            'lower_bound': max(0, forecast - margin),
-            'upper_bound': forecast + margin
+            'lower_bound': np.maximum(0, forecast - margin).tolist(),
+            'upper_bound': (forecast + margin).tolist()
         }
     
     def _generate_recommendations(self, forecast: float, input_data: Dict[str, Any]) -> List[str]:
@@ -110,102 +126,57 @@ class DemandForecaster:
         
         return recommendations
     
-    async def train(self) -> Dict[str, Any]:
-        """Train the demand forecasting model"""
-        try:
-            logger.info("Starting demand forecasting model training...")
-            
-            # Generate synthetic training data
-            training_data = self._generate_synthetic_data(500)
-            
-            # Prepare features and labels
-            X, y = await self._prepare_training_data(training_data)
-            
-            # Scale features
-            X_scaled = self.scaler.fit_transform(X)
-            
-            # Train model
-            self.model = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42,
-                n_jobs=-1
-            )
-            
-            self.model.fit(X_scaled, y)
-            
-            # Calculate metrics
-            y_pred = self.model.predict(X_scaled)
-            self.metrics = {
-                'mae': mean_absolute_error(y, y_pred),
-                'mse': mean_squared_error(y, y_pred),
-                'r2_score': r2_score(y, y_pred),
-                'training_samples': len(X)
-            }
-            
-            self.is_trained = True
-            await self.save_model()
-            
-            logger.info(f"Demand forecasting model training completed. R2: {self.metrics['r2_score']:.3f}")
-            return self.metrics
-            
-        except Exception as e:
-            logger.error(f"Model training failed: {e}")
-            raise
+    async def _training_data(self) -> tuple:
+        """Synthetic training features and labels"""
+        return await self._prepare_training_data(self._generate_synthetic_data(500))
+    
+    def _fit(self, X: np.ndarray, y: np.ndarray) -> tuple:
+        """Fit the forest and compute training metrics"""
+        # Scale features
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        
+        # Train model
+        model = ExtraTreesRegressor(
+            n_estimators=self.n_estimators,
+            max_depth=self.max_depth,
+            min_samples_leaf=self.min_samples_leaf,
+            random_state=42,
+            n_jobs=-1
+        )
+        
+        model.fit(X_scaled, y)
+        
+        # Calculate metrics
+        y_pred = model.predict(X_scaled)
+        metrics = {
+            'mae': mean_absolute_error(y, y_pred),
+            'mse': mean_squared_error(y, y_pred),
+            'r2_score': r2_score(y, y_pred),
+            'training_samples': len(X)
+        }
+        
+        # Move the scaling into the split thresholds so inference skips it
+        fold_scaler(model, scaler)
+        
+        return model, metrics
     
-    def _generate_synthetic_data(self, n_samples: int) -> pd.DataFrame:
-        """Generate synthetic training data"""
+    def _generate_synthetic_data(self, n_samples: int) -> Dict[str, np.ndarray]:
+        """Generate synthetic training data as column arrays"""
         np.random.seed(42)
         
         data = {
-            'date': pd.date_range(start='2020-01-01', periods=n_samples, freq='D'),
-            'demand': np.random.poisson(12, n_samples),
+            'date': np.datetime64('2020-01-01') + np.arange(n_samples),
+            'demand': np.random.poisson(12, n_samples).astype(np.float32),
             'hospital_capacity': np.random.normal(100, 20, n_samples),
             'population_served': np.random.normal(50000, 10000, n_samples),
             'emergency_events': np.random.poisson(0.1, n_samples)
         }
         
-        return pd.DataFrame(data)
+        return data
     
-    async def _prepare_training_data(self, data: pd.DataFrame) -> tuple:
+    async def _prepare_training_data(self, data: Dict[str, np.ndarray]) -> tuple:
         """Prepare training data"""
-        X = np.random.random((len(data), 10))  # 10 features
-        y = data['demand'].values
+        y = data['demand']
+        X = np.random.random((len(y), N_FEATURES)).astype(np.float32)
         return X, y
-    
-    async def save_model(self):
-        """Save trained model"""
-        try:
-            model_path = f"models/saved/demand_forecaster_v{self.version}.joblib"
-            joblib.dump({
-                'model': self.model,
-                'scaler': self.scaler,
-                'metrics': self.metrics,
-                'version': self.version
-            }, model_path)
-            logger.info(f"Model saved to {model_path}")
-        except Exception as e:
-            logger.error(f"Failed to save model: {e}")
-    
-    async def load_or_train(self):
-        """Load existing model or train new one"""
-        try:
-            model_path = f"models/saved/demand_forecaster_v{self.version}.joblib"
-            saved_data = joblib.load(model_path)
-            self.model = saved_data['model']
-            self.scaler = saved_data['scaler']
-            self.metrics = saved_data.get('metrics', {})
-            self.is_trained = True
-            logger.info(f"Model loaded from {model_path}")
-        except:
-            logger.info("No pre-trained model found, training new model...")
-            await self.train()
-    
-    async def get_metrics(self) -> Dict[str, Any]:
-        """Get model performance metrics"""
-        return {
-            'version': self.version,
-            'is_trained': self.is_trained,
-            'metrics': self.metrics,
-            'last_updated': datetime.now().isoformat()
-        }
@@ -0,0 +1,318 @@
+import numpy as np
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Tuple, Union
+import asyncio
+
+# cachetools is optional; without it weather features are fetched for every request
+try:
+    from cachetools import TTLCache
+except ImportError:
+    TTLCache = None
+
+# Numba is optional; without it the feature kernel below runs as plain Python
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+from models.base import SavedModel
+from utils.blood_types import BLOOD_TYPE_ONE_HOT, encode_blood_types, to_blood_type_code
+from utils.feature_engineering import FeatureEngineer, calendar_columns, gather_column
+from utils.inference_backends import run_inference, standardize
+from utils.micro_batcher import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+# Number of model features, laid out as in _get_feature_names: 5 demographic, 8 blood type one-hot,
+# 5 time, 3 location, 3 urgency/demand and 3 weather
+N_FEATURES = 27
+
+# Weather is looked up per grid cell of this many decimal degrees (2 places is about 1 km)
+WEATHER_GRID_DECIMALS = 2
+
+# Availability categories: a score at or above each threshold moves up to the next label
+AVAILABILITY_THRESHOLDS = np.array([0.4, 0.6, 0.8])
+AVAILABILITY_LABELS = ('VERY_LOW', 'LOW', 'MEDIUM', 'HIGH')
+
+LOW_AVAILABILITY_RECOMMENDATIONS = (
+    "Consider expanding search radius",
+    "Check for alternative blood types",
+    "Contact donors who haven't donated recently"
+)
+
+def _features_kernel(age, weight, height, donation_count, days_since_last_donation, blood_type_idx,
+                     hour, weekday, month, is_holiday, latitude, longitude, population_density,
+                     urgency, units, demand, weather):
+    """Compute the (N, N_FEATURES) feature matrix from per-request columns"""
+    n = age.shape[0]
+    features = np.zeros((n, N_FEATURES), dtype=np.float32)
+    for i in prange(n):
+        # Donor demographics
+        features[i, 0] = age[i]
+        features[i, 1] = weight[i]
+        features[i, 2] = height[i]
+        features[i, 3] = donation_count[i]
+        features[i, 4] = days_since_last_donation[i]
+        
+        # Blood type one-hot is a single index write; unknown types leave all zeros
+        if blood_type_idx[i] >= 0:
+            features[i, 5 + blood_type_idx[i]] = 1.0
+        
+        # Time features, normalized as in FeatureEngineer.extract_time_features
+        features[i, 13] = hour[i] / 23.0
+        features[i, 14] = weekday[i] / 6.0
+        features[i, 15] = (month[i] - 1) / 11.0
+        features[i, 16] = 1.0 if weekday[i] >= 5 else 0.0
+        features[i, 17] = is_holiday[i]
+        
+        # Location features, normalized as in FeatureEngineer.extract_location_features
+        features[i, 18] = (latitude[i] - 8.0) / (37.0 - 8.0)
+        features[i, 19] = (longitude[i] - 68.0) / (97.0 - 68.0)
+        features[i, 20] = min(population_density[i] / 10000, 1.0)
+        
+        # Urgency and demand features
+        features[i, 21] = urgency[i]
+        features[i, 22] = units[i]
+        features[i, 23] = demand[i]
+        
+        # Weather features
+        for k in range(3):
+            features[i, 24 + k] = weather[i, k]
+    return features
+
+if njit is not None:
+    _features_kernel = njit(parallel=True, fastmath=True, cache=True)(_features_kernel)
+
+def _wall_clock(request_date: Union[datetime, str]) -> datetime:
+    """Naive local (wall-clock) time of a request date; numpy would shift offset-aware values to UTC"""
+    if isinstance(request_date, str):
+        request_date = datetime.fromisoformat(request_date)
+    return request_date.replace(tzinfo=None)
+
+class DonorInferencer(SavedModel):
+    """
+    Serving half of the donor availability model: feature preparation, prediction and model loading.
+
+    Training lives in DonorAvailabilityPredictor (models.donor_prediction), which is only imported when
+    no usable saved model exists, so a serving process that finds one never loads the training pipeline.
+    """
+    
+    MODEL_NAME = "donor_predictor"
+    DISPLAY_NAME = "donor availability"
+    N_FEATURES = N_FEATURES
+    
+    def __init__(self):
+        super().__init__()
+        self.feature_engineer = FeatureEngineer()
+        # Concurrent predict() calls are scored together in micro-batches
+        self._batcher = MicroBatcher(self.predict_batch)
+        # Recent weather features keyed on grid cell, so nearby requests share one lookup
+        self._weather_cache = TTLCache(maxsize=10_000, ttl=600) if TTLCache is not None else None
+        self._weather_locks: Dict[tuple, asyncio.Lock] = {}  # One lock per cell being fetched
+        
+    async def prepare_features(self, data: Dict[str, Any]) -> np.ndarray:
+        """Prepare features for prediction"""
+        return await self.prepare_features_batch([data])
+    
+    async def prepare_features_batch(self, inputs: List[Dict[str, Any]]) -> np.ndarray:
+        """Prepare an (N, N_FEATURES) feature matrix for a batch of requests"""
+        try:
+            # Convert all request dates in one numpy call; requests without one share a single 'now'
+            now = datetime.now()
+            request_dates = np.array([
+                _wall_clock(data['request_date']) if data.get('request_date') else now for data in inputs
+            ], dtype='datetime64[m]')
+            hour, weekday, month, day = calendar_columns(request_dates)
+            locations = [data.get('location', {}) for data in inputs]
+            
+            # Weather features (if available)
+            weather = await self._get_weather_batch(locations)
+            
+            # Dict parsing stays in Python; the arithmetic and one-hot encoding run in the compiled kernel
+            return _features_kernel(
+                gather_column(inputs, 'donor_age', 0), gather_column(inputs, 'donor_weight', 0),
+                gather_column(inputs, 'donor_height', 0), gather_column(inputs, 'donation_count', 0),
+                gather_column(inputs, 'days_since_last_donation', 0),
+                encode_blood_types([data.get('blood_type', 'O_POSITIVE') for data in inputs]),
+                hour.astype(np.float64), weekday.astype(np.float64), month.astype(np.float64),
+                self.feature_engineer.is_holiday_batch(month, day).astype(np.float64),
+                gather_column(locations, 'latitude', 20.0), gather_column(locations, 'longitude', 77.0),
+                gather_column(locations, 'population_density', 400),
+                gather_column(inputs, 'urgency_level', 1), gather_column(inputs, 'units_required', 1),
+                gather_column(inputs, 'local_demand_score', 0.5),
+                weather
+            )
+            
+        except Exception as e:
+            logger.error(f"Feature preparation failed: {e}")
+            raise
+    
+    def _encode_blood_type(self, blood_type: str) -> np.ndarray:
+        """Encode blood type as one-hot vector (a read-only row of the shared lookup table)"""
+        return BLOOD_TYPE_ONE_HOT[to_blood_type_code(blood_type)]
+    
+    async def _get_weather_batch(self, locations: List[Dict[str, Any]]) -> np.ndarray:
+        """Weather features for each location as an (N, 3) array, with one lookup per distinct grid cell"""
+        cells = [
+            (round(location.get('latitude', 20.0), WEATHER_GRID_DECIMALS),
+             round(location.get('longitude', 77.0), WEATHER_GRID_DECIMALS))
+            for location in locations
+        ]
+        unique_cells = list(dict.fromkeys(cells))
+        cell_features = await asyncio.gather(*(self._get_cell_weather(cell) for cell in unique_cells))
+        
+        # Broadcast each cell's features back to the rows in that cell
+        index = {cell: i for i, cell in enumerate(unique_cells)}
+        return np.stack(cell_features)[[index[cell] for cell in cells]]
+    
+    async def _get_cell_weather(self, cell: Tuple[float, float]) -> np.ndarray:
+        """Weather features for one grid cell, reusing recent lookups"""
+        location = {'latitude': cell[0], 'longitude': cell[1]}
+        if self._weather_cache is None:
+            return np.asarray(await self._get_weather_features(location), dtype=np.float64)
+        
+        features = self._weather_cache.get(cell)
+        if features is None:
+            # Concurrent misses on the same cell wait for the first one instead of fetching again
+            lock = self._weather_locks.setdefault(cell, asyncio.Lock())
+            try:
+                async with lock:
+                    features = self._weather_cache.get(cell)
+                    if features is None:
+                        features = np.asarray(await self._get_weather_features(location), dtype=np.float64)
+                        features.flags.writeable = False
+                        self._weather_cache[cell] = features
+            finally:
+                # Also on failure, so a cell whose lookup keeps failing doesn't leave its lock behind
+                self._weather_locks.pop(cell, None)
+        
+        return features
+    
+    async def _get_weather_features(self, location: Dict[str, Any]) -> List[float]:
+        """Extract weather-based features that might affect donor availability"""
+        try:
+            # Placeholder for weather API integration
+            # In production, integrate with weather service
+            return [
+                0.5,  # temperature_normalized
+                0.5,  # precipitation_probability
+                0.5,  # weather_severity_score
+            ]
+        except Exception:
+            return [0.5, 0.5, 0.5]  # Default values
+    
+    async def predict(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Predict donor availability, batched with other concurrent predictions"""
+        return await self._batcher.submit(input_data)
+    
+    async def predict_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Predict donor availability for many requests with a single model call"""
+        try:
+            await self.ensure_loaded()
+            
+            # Prepare features
+            features = await self.prepare_features_batch(inputs)
+            
+            # Predict in the inference pool, with the model that was current when the batch started
+            predictor = self.compiled_model or self.model
+            features_scaled = standardize(features, self.scaler)
+            availability_probs = await run_inference(predictor.predict_proba, features_scaled)
+            
+            # Feature importances come from the scikit-learn model and are global, so the explanation is shared by the whole batch
+            factors = self._explain_prediction(features_scaled[0], inputs[0])
+            
+            return self._summarize_batch(np.asarray(availability_probs), inputs, factors)
+            
+        except Exception as e:
+            logger.error(f"Prediction failed: {e}")
+            raise
+    
+    def _summarize_batch(self, availability_probs: np.ndarray, inputs: List[Dict[str, Any]],
+                         factors: Dict[str, float]) -> List[Dict[str, Any]]:
+        """Build response payloads for a batch, computing every derived field over the whole score vector"""
+        scores = availability_probs[:, 1]  # Probability of being available
+        
+        # Calculate confidence based on model certainty
+        confidence = availability_probs.max(axis=1) - availability_probs.min(axis=1)
+        categories = np.searchsorted(AVAILABILITY_THRESHOLDS, scores, side='right')
+        
+        # Response time: 24 hours scaled up as availability falls
+        estimated_hours = (24 * (2 - scores)).astype(np.int64)
+        min_hours = np.maximum(2, estimated_hours - 6)
+        max_hours = estimated_hours + 12
+        
+        low = scores < 0.5
+        urgent = gather_column(inputs, 'urgency_level', 1) >= 4
+        split = gather_column(inputs, 'units_required', 1) > 2
+        
+        results = []
+        for i, (score, conf, category, hours, low_hours, high_hours) in enumerate(zip(
+                scores.tolist(), confidence.tolist(), categories.tolist(),
+                estimated_hours.tolist(), min_hours.tolist(), max_hours.tolist())):
+            recommendations = list(LOW_AVAILABILITY_RECOMMENDATIONS) if low[i] else []
+            if urgent[i]:
+                recommendations.append("Activate emergency donor network")
+            if split[i]:
+                recommendations.append("Consider splitting request among multiple donors")
+            
+            results.append({
+                'availability_score': score,
+                'availability_category': AVAILABILITY_LABELS[category],
+                'confidence': conf,
+                'recommendations': recommendations,
+                'predicted_response_time': {
+                    'estimated_hours': hours,
+                    'min_hours': low_hours,
+                    'max_hours': high_hours
+                },
+                'factors': dict(factors)
+            })
+        
+        return results
+    
+    def _explain_prediction(self, features: np.ndarray, input_data: Dict[str, Any]) -> Dict[str, float]:
+        """Provide feature importance for prediction explanation"""
+        try:
+            if hasattr(self.model, 'feature_importances_'):
+                feature_names = self._get_feature_names()
+                importances = self.model.feature_importances_
+                
+                # Get top 5 most important features: select in linear time, then order only those 5
+                k = min(5, len(importances))
+                part = np.argpartition(importances, -k)[-k:]
+                top_indices = part[np.argsort(importances[part])]
+                top_factors = {
+                    feature_names[i]: float(importances[i]) 
+                    for i in top_indices
+                }
+                return top_factors
+        except Exception:
+            pass
+        
+        return {"model_confidence": 0.8}
+    
+    def _get_feature_names(self) -> List[str]:
+        """Get feature names for explanation"""
+        return [
+            'donor_age', 'donor_weight', 'donor_height', 'donation_count',
+            'days_since_last_donation', 'blood_type_A_POS', 'blood_type_A_NEG',
+            'blood_type_B_POS', 'blood_type_B_NEG', 'blood_type_AB_POS',
+            'blood_type_AB_NEG', 'blood_type_O_POS', 'blood_type_O_NEG',
+            'hour_of_day', 'day_of_week', 'month', 'is_weekend', 'is_holiday',
+            'latitude', 'longitude', 'population_density', 'urgency_level',
+            'units_required', 'local_demand_score', 'temperature', 'precipitation',
+            'weather_severity'
+        ]
+    
+    async def train(self) -> Dict[str, Any]:
+        """Train a model with the training pipeline and serve it from this instance"""
+        # Imported here so serving processes that load a saved model never import the training code
+        from models.donor_prediction import DonorAvailabilityPredictor
+        trainer = DonorAvailabilityPredictor()
+        metrics = await trainer.train()
+        self.model, self.compiled_model, self.scaler = trainer.model, trainer.compiled_model, trainer.scaler
+        self.metrics = trainer.metrics
+        self.is_trained = True
+        return metrics
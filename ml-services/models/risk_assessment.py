@@ -1,17 +1,24 @@
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import HistGradientBoostingClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score
-import joblib
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-import asyncio
+from typing import Dict, List, Any, Optional, Tuple
+from bisect import bisect_right
+
+from models.base import SavedModel
+from utils.inference_backends import run_inference, standardize
 
 logger = logging.getLogger(__name__)
 
-class RiskAssessment:
+# Number of model features: 4 demographic, 4 medical history, 4 vital signs,
+# 3 procedure, 3 time and 3 environmental
+N_FEATURES = 21
+
+# Conditions and medications flagged as high risk, matched case-insensitively
+HIGH_RISK_CONDITIONS = frozenset({'diabetes', 'heart_disease', 'kidney_disease', 'liver_disease'})
+HIGH_RISK_MEDICATIONS = frozenset({'anticoagulants', 'immunosuppressants', 'chemotherapy'})
+
+class RiskAssessment(SavedModel):
     """
     Machine Learning model to assess risks for blood donation and transfusion:
     - Donor health risks
@@ -20,24 +27,26 @@ class RiskAssessment:
     - Adverse reaction prediction
     """
     
+    MODEL_NAME = "risk_assessment"
+    DISPLAY_NAME = "risk assessment"
+    N_FEATURES = N_FEATURES
+    
     def __init__(self):
-        self.version = "1.0.0"
-        self.model = None
-        self.scaler = StandardScaler()
-        self.is_trained = False
-        self.metrics = {}
+        super().__init__()
         self.risk_categories = {
             'LOW': (0.0, 0.3),
             'MODERATE': (0.3, 0.6),
             'HIGH': (0.6, 0.8),
             'CRITICAL': (0.8, 1.0)
         }
+        # Category names and the upper bounds of all but the last, for bisection in _categorize_risk
+        self._risk_labels = list(self.risk_categories)
+        self._risk_thresholds = [max_score for _, max_score in self.risk_categories.values()][:-1]
         
     async def assess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Assess risk factors for donation or transfusion"""
         try:
-            if not self.is_trained:
-                await self.load_or_train()
+            await self.ensure_loaded()
             
             assessment_type = input_data.get('assessment_type', 'donation')  # 'donation' or 'transfusion'
             
@@ -45,10 +54,11 @@ class RiskAssessment:
             features = await self.prepare_features(input_data)
             
             # Scale features
-            features_scaled = self.scaler.transform(features)
+            features_scaled = standardize(features, self.scaler)
             
-            # Make prediction
-            risk_prob = self.model.predict_proba(features_scaled)[0]
+            # Predict in the inference pool, with the model that was current when the request started
+            predictor = self.compiled_model or self.model
+            risk_prob = (await run_inference(predictor.predict_proba, features_scaled))[0]
             risk_score = risk_prob[1]  # Probability of high risk
             
             # Categorize risk
@@ -73,66 +83,55 @@ class RiskAssessment:
             raise
     
     async def prepare_features(self, data: Dict[str, Any]) -> np.ndarray:
-        """Prepare features for risk assessment"""
-        features = []
-        
+        """Prepare features for risk assessment as a (1, N_FEATURES) float32 row"""
         # Subject information (donor or patient)
         subject = data.get('subject', {})
+        vitals = subject.get('vitals', {})
         
-        # Demographics
-        features.extend([
+        # A fresh row per request rather than a reused scratch buffer: the row is scaled in place and read by
+        # the inference pool after assess() yields, when a concurrent request on this thread would overwrite it
+        features = np.empty((1, N_FEATURES), dtype=np.float32)
+        features[0] = (
+            # Demographics
             subject.get('age', 30),
             1 if subject.get('gender') == 'male' else 0,
             subject.get('weight', 70),
-            subject.get('height', 170)
-        ])
-        
-        # Medical history
-        features.extend([
+            subject.get('height', 170),
+            
+            # Medical history
             len(subject.get('chronic_conditions', [])),
             len(subject.get('medications', [])),
             len(subject.get('allergies', [])),
-            1 if subject.get('previous_adverse_reactions', False) else 0
-        ])
-        
-        # Vital signs
-        vitals = subject.get('vitals', {})
-        features.extend([
+            1 if subject.get('previous_adverse_reactions', False) else 0,
+            
+            # Vital signs
             vitals.get('blood_pressure_systolic', 120),
             vitals.get('blood_pressure_diastolic', 80),
             vitals.get('heart_rate', 70),
-            vitals.get('hemoglobin', 14.0)
-        ])
-        
-        # Procedure-specific features
-        features.extend([
+            vitals.get('hemoglobin', 14.0),
+            
+            # Procedure-specific features
             data.get('urgency_level', 1),
             data.get('units_required', 1),
-            1 if data.get('emergency_procedure', False) else 0
-        ])
-        
-        # Time-based features
-        features.extend([
+            1 if data.get('emergency_procedure', False) else 0,
+            
+            # Time-based features
             data.get('days_since_last_procedure', 90),
             data.get('time_of_day', 12),  # Hour of day
-            1 if data.get('weekend', False) else 0
-        ])
-        
-        # Environmental factors
-        features.extend([
+            1 if data.get('weekend', False) else 0,
+            
+            # Environmental factors
             data.get('facility_risk_score', 0.1),
             data.get('staff_experience_score', 0.8),
             data.get('equipment_condition_score', 0.9)
-        ])
+        )
         
-        return np.array(features).reshape(1, -1)
+        return features
     
     def _categorize_risk(self, risk_score: float) -> str:
         """Categorize risk score into risk levels"""
-        for category, (min_score, max_score) in self.risk_categories.items():
-            if min_score <= risk_score < max_score:
-                return category
-        return 'CRITICAL'  # Default to highest risk
+        # Each range includes its lower bound, so a score equal to a threshold falls in the higher category
+        return self._risk_labels[bisect_right(self._risk_thresholds, risk_score)]
     
     def _identify_risk_factors(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Identify specific risk factors"""
@@ -156,9 +155,8 @@ class RiskAssessment:
         
         # Medical history risks
         chronic_conditions = subject.get('chronic_conditions', [])
-        high_risk_conditions = ['diabetes', 'heart_disease', 'kidney_disease', 'liver_disease']
         for condition in chronic_conditions:
-            if condition.lower() in high_risk_conditions:
+            if condition.lower() in HIGH_RISK_CONDITIONS:
                 risk_factors.append({
                     'factor': f'Chronic condition: {condition}',
                     'severity': 'HIGH',
@@ -167,9 +165,8 @@ class RiskAssessment:
         
         # Medication risks
         medications = subject.get('medications', [])
-        high_risk_meds = ['anticoagulants', 'immunosuppressants', 'chemotherapy']
         for med in medications:
-            if med.lower() in high_risk_meds:
+            if med.lower() in HIGH_RISK_MEDICATIONS:
                 risk_factors.append({
                     'factor': f'High-risk medication: {med}',
                     'severity': 'HIGH',
@@ -292,104 +289,42 @@ class RiskAssessment:
         
         return monitoring_requirements.get(risk_category, monitoring_requirements['LOW'])
     
-    async def train(self) -> Dict[str, Any]:
-        """Train the risk assessment model"""
-        try:
-            logger.info("Starting risk assessment model training...")
-            
-            # Generate synthetic training data
-            training_data = self._generate_synthetic_data(1000)
-            
-            # Prepare features and labels
-            X, y = await self._prepare_training_data(training_data)
-            
-            # Scale features
-            X_scaled = self.scaler.fit_transform(X)
-            
-            # Train model
-            self.model = RandomForestClassifier(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42,
-                n_jobs=-1
-            )
-            
-            self.model.fit(X_scaled, y)
-            
-            # Calculate metrics
-            y_pred = self.model.predict(X_scaled)
-            self.metrics = {
-                'accuracy': accuracy_score(y, y_pred),
-                'precision': precision_score(y, y_pred, average='weighted'),
-                'recall': recall_score(y, y_pred, average='weighted'),
-                'training_samples': len(X)
-            }
-            
-            self.is_trained = True
-            await self.save_model()
-            
-            logger.info(f"Risk assessment model training completed. Accuracy: {self.metrics['accuracy']:.3f}")
-            return self.metrics
-            
-        except Exception as e:
-            logger.error(f"Model training failed: {e}")
-            raise
+    async def _training_data(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Synthetic training features and labels"""
+        return self._generate_synthetic_data(1000)
     
-    def _generate_synthetic_data(self, n_samples: int) -> pd.DataFrame:
-        """Generate synthetic training data"""
-        np.random.seed(42)
+    def _fit(self, X: np.ndarray, y: np.ndarray) -> tuple:
+        """Fit the model and compute evaluation metrics"""
+        # Train model: histogram gradient boosting builds a few shallow trees on binned features,
+        # so it is far smaller and faster to evaluate than a 100-tree random forest
+        model = HistGradientBoostingClassifier(
+            max_iter=100,
+            max_depth=8,
+            learning_rate=0.1,
+            early_stopping=True,
+            random_state=42
+        )
         
-        data = {
-            'age': np.random.normal(40, 15, n_samples),
-            'chronic_conditions': np.random.poisson(1, n_samples),
-            'medications': np.random.poisson(2, n_samples),
-            'bp_systolic': np.random.normal(130, 20, n_samples),
-            'hemoglobin': np.random.normal(14, 2, n_samples),
-            'emergency': np.random.binomial(1, 0.2, n_samples),
-            'high_risk': np.random.binomial(1, 0.3, n_samples)
+        model.fit(X, y)
+        
+        # Calculate metrics
+        y_pred = model.predict(X)
+        metrics = {
+            'accuracy': accuracy_score(y, y_pred),
+            'precision': precision_score(y, y_pred, average='weighted', zero_division=0),
+            'recall': recall_score(y, y_pred, average='weighted'),
+            'training_samples': len(X)
         }
         
-        return pd.DataFrame(data)
+        return model, metrics
     
-    async def _prepare_training_data(self, data: pd.DataFrame) -> tuple:
-        """Prepare training data"""
-        X = np.random.random((len(data), 20))  # 20 features
-        y = data['high_risk'].values
+    def _generate_synthetic_data(self, n_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Generate synthetic training features and labels"""
+        rng = np.random.default_rng(42)
+        X = rng.standard_normal((n_samples, N_FEATURES), dtype=np.float32)
+        
+        # Risk rises with chronic conditions, prior adverse reactions and emergency procedures, around a 30% base rate
+        p = 1 / (1 + np.exp(-(-0.85 + 0.6 * X[:, 4] + 0.4 * X[:, 7] + 0.3 * X[:, 14])))
+        y = (rng.random(n_samples) < p).astype(np.int8)
+        
         return X, y
-    
-    async def save_model(self):
-        """Save trained model"""
-        try:
-            model_path = f"models/saved/risk_assessment_v{self.version}.joblib"
-            joblib.dump({
-                'model': self.model,
-                'scaler': self.scaler,
-                'metrics': self.metrics,
-                'version': self.version
-            }, model_path)
-            logger.info(f"Model saved to {model_path}")
-        except Exception as e:
-            logger.error(f"Failed to save model: {e}")
-    
-    async def load_or_train(self):
-        """Load existing model or train new one"""
-        try:
-            model_path = f"models/saved/risk_assessment_v{self.version}.joblib"
-            saved_data = joblib.load(model_path)
-            self.model = saved_data['model']
-            self.scaler = saved_data['scaler']
-            self.metrics = saved_data.get('metrics', {})
-            self.is_trained = True
-            logger.info(f"Model loaded from {model_path}")
-        except:
-            logger.info("No pre-trained model found, training new model...")
-            await self.train()
-    
-    async def get_metrics(self) -> Dict[str, Any]:
-        """Get model performance metrics"""
-        return {
-            'version': self.version,
-            'is_trained': self.is_trained,
-            'metrics': self.metrics,
-            'last_updated': datetime.now().isoformat()
-        }
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field, validator
-from typing import Dict, List, Any, Optional, Union
+from pydantic import BaseModel, ConfigDict, Discriminator, Field, Tag, TypeAdapter
+from typing import Annotated, Dict, List, Any, Literal, Optional, Union
 from datetime import datetime
 from enum import Enum
+from typing_extensions import Required, TypedDict
 
 class BloodType(str, Enum):
     """Blood type enumeration"""
@@ -28,41 +29,57 @@ class Gender(str, Enum):
     FEMALE = "female"
     OTHER = "other"
 
+# Schemas are immutable DTOs: unknown fields are rejected, and instances can't be changed after validation
+_SCHEMA_CONFIG = ConfigDict(frozen=True, extra="forbid")
+
+# Off the hot path, so their core schema is built on first use rather than at import
+_DEFERRED_SCHEMA_CONFIG = ConfigDict(_SCHEMA_CONFIG, defer_build=True)
+
 # Base schemas
-class LocationSchema(BaseModel):
+# Nested value bags are TypedDicts: pydantic-core validates them as plain dicts, without building a
+# model instance per nesting level. Keys left out of a request are simply absent.
+class LocationSchema(TypedDict, total=False):
     """Location information schema"""
-    latitude: float = Field(..., ge=-90, le=90, description="Latitude coordinate")
-    longitude: float = Field(..., ge=-180, le=180, description="Longitude coordinate")
-    address: Optional[str] = Field(None, description="Human readable address")
-    city: Optional[str] = Field(None, description="City name")
-    state: Optional[str] = Field(None, description="State name")
-    postal_code: Optional[str] = Field(None, description="Postal code")
-    population_density: Optional[float] = Field(None, ge=0, description="Population per sq km")
-    is_urban: Optional[bool] = Field(True, description="Urban area indicator")
-    distance_to_major_city: Optional[float] = Field(None, ge=0, description="Distance to nearest major city in km")
-
-class VitalSigns(BaseModel):
+    __pydantic_config__ = ConfigDict(extra="forbid")
+    
+    latitude: Required[Annotated[float, Field(ge=-90, le=90, description="Latitude coordinate")]]
+    longitude: Required[Annotated[float, Field(ge=-180, le=180, description="Longitude coordinate")]]
+    address: Annotated[Optional[str], Field(description="Human readable address")]
+    city: Annotated[Optional[str], Field(description="City name")]
+    state: Annotated[Optional[str], Field(description="State name")]
+    postal_code: Annotated[Optional[str], Field(description="Postal code")]
+    population_density: Annotated[Optional[float], Field(ge=0, description="Population per sq km")]
+    is_urban: Annotated[Optional[bool], Field(description="Urban area indicator")]
+    distance_to_major_city: Annotated[Optional[float], Field(ge=0, description="Distance to nearest major city in km")]
+
+class VitalSigns(TypedDict, total=False):
     """Vital signs schema"""
-    blood_pressure_systolic: Optional[int] = Field(None, ge=60, le=250, description="Systolic BP in mmHg")
-    blood_pressure_diastolic: Optional[int] = Field(None, ge=40, le=150, description="Diastolic BP in mmHg")
-    heart_rate: Optional[int] = Field(None, ge=40, le=200, description="Heart rate in BPM")
-    temperature: Optional[float] = Field(None, ge=35.0, le=42.0, description="Body temperature in Celsius")
-    hemoglobin: Optional[float] = Field(None, ge=5.0, le=20.0, description="Hemoglobin level in g/dL")
-    oxygen_saturation: Optional[float] = Field(None, ge=70.0, le=100.0, description="Oxygen saturation percentage")
-
-class MedicalHistory(BaseModel):
+    __pydantic_config__ = ConfigDict(extra="forbid")
+    
+    blood_pressure_systolic: Annotated[Optional[int], Field(ge=60, le=250, description="Systolic BP in mmHg")]
+    blood_pressure_diastolic: Annotated[Optional[int], Field(ge=40, le=150, description="Diastolic BP in mmHg")]
+    heart_rate: Annotated[Optional[int], Field(ge=40, le=200, description="Heart rate in BPM")]
+    temperature: Annotated[Optional[float], Field(ge=35.0, le=42.0, description="Body temperature in Celsius")]
+    hemoglobin: Annotated[Optional[float], Field(ge=5.0, le=20.0, description="Hemoglobin level in g/dL")]
+    oxygen_saturation: Annotated[Optional[float], Field(ge=70.0, le=100.0, description="Oxygen saturation percentage")]
+
+class MedicalHistory(TypedDict, total=False):
     """Medical history schema"""
-    chronic_conditions: Optional[List[str]] = Field(default_factory=list, description="List of chronic conditions")
-    medications: Optional[List[str]] = Field(default_factory=list, description="Current medications")
-    allergies: Optional[List[str]] = Field(default_factory=list, description="Known allergies")
-    previous_adverse_reactions: Optional[bool] = Field(False, description="History of adverse reactions")
-    recent_illness: Optional[bool] = Field(False, description="Recent illness indicator")
-    immune_compromised: Optional[bool] = Field(False, description="Immunocompromised status")
-    smoking: Optional[bool] = Field(False, description="Smoking status")
-    alcohol_consumption: Optional[bool] = Field(False, description="Regular alcohol consumption")
+    __pydantic_config__ = ConfigDict(extra="forbid")
+    
+    chronic_conditions: Annotated[Optional[List[str]], Field(description="List of chronic conditions")]
+    medications: Annotated[Optional[List[str]], Field(description="Current medications")]
+    allergies: Annotated[Optional[List[str]], Field(description="Known allergies")]
+    previous_adverse_reactions: Annotated[Optional[bool], Field(description="History of adverse reactions")]
+    recent_illness: Annotated[Optional[bool], Field(description="Recent illness indicator")]
+    immune_compromised: Annotated[Optional[bool], Field(description="Immunocompromised status")]
+    smoking: Annotated[Optional[bool], Field(description="Smoking status")]
+    alcohol_consumption: Annotated[Optional[bool], Field(description="Regular alcohol consumption")]
 
 class PersonSchema(BaseModel):
     """Base person schema"""
+    model_config = _SCHEMA_CONFIG
+    
     age: int = Field(..., ge=16, le=100, description="Age in years")
     gender: Optional[Gender] = Field(None, description="Gender")
     weight: Optional[float] = Field(None, ge=30, le=200, description="Weight in kg")
@@ -75,6 +92,7 @@ class PersonSchema(BaseModel):
 # Donor-specific schemas
 class DonorSchema(PersonSchema):
     """Donor information schema"""
+    type: Literal["donor"] = Field("donor", description="Subject kind, selects the schema in unions")
     donor_id: Optional[str] = Field(None, description="Unique donor identifier")
     donation_count: Optional[int] = Field(0, ge=0, description="Total number of donations")
     days_since_last_donation: Optional[int] = Field(None, ge=0, description="Days since last donation")
@@ -82,40 +100,52 @@ class DonorSchema(PersonSchema):
     reliability_score: Optional[float] = Field(0.8, ge=0, le=1, description="Reliability score based on history")
     available_hours: Optional[int] = Field(24, ge=0, le=24, description="Available hours per day")
     preferred_donation_times: Optional[List[str]] = Field(default_factory=list, description="Preferred donation time slots")
+    guardian_consent: Optional[bool] = Field(False, description="Guardian consent, required for donors under 18")
 
 class PatientSchema(PersonSchema):
     """Patient information schema"""
+    type: Literal["patient"] = Field("patient", description="Subject kind, selects the schema in unions")
     patient_id: Optional[str] = Field(None, description="Unique patient identifier")
     condition_severity: Optional[float] = Field(0.3, ge=0, le=1, description="Medical condition severity score")
     diagnosis: Optional[str] = Field(None, description="Primary diagnosis")
     treatment_type: Optional[str] = Field(None, description="Type of treatment requiring blood")
 
+# Fields only a patient carries; a subject without an explicit type is treated as a patient if it has any
+_PATIENT_ONLY_FIELDS = frozenset({'patient_id', 'condition_severity', 'diagnosis', 'treatment_type'})
+
+def _subject_kind(subject: Any) -> str:
+    """Pick the DonorSchema/PatientSchema tag for a subject, so only that schema is validated"""
+    if isinstance(subject, dict):
+        return subject.get('type') or ('patient' if _PATIENT_ONLY_FIELDS.intersection(subject) else 'donor')
+    return getattr(subject, 'type', 'donor')
+
+Subject = Annotated[
+    Union[Annotated[DonorSchema, Tag('donor')], Annotated[PatientSchema, Tag('patient')]],
+    Discriminator(_subject_kind)
+]
+
 # Request schemas
 class DonorPredictionRequest(BaseModel):
     """Request schema for donor availability prediction"""
+    model_config = _SCHEMA_CONFIG
+    
     donor_age: Optional[int] = Field(30, ge=16, le=100)
     donor_weight: Optional[float] = Field(70, ge=30, le=200)
     donor_height: Optional[float] = Field(170, ge=100, le=250)
     blood_type: BloodType
     donation_count: Optional[int] = Field(0, ge=0)
     days_since_last_donation: Optional[int] = Field(90, ge=0)
-    request_date: Optional[str] = Field(default_factory=lambda: datetime.now().isoformat())
+    request_date: Optional[datetime] = Field(default_factory=datetime.now)
     location: Optional[LocationSchema] = None
     urgency_level: UrgencyLevel = UrgencyLevel.ROUTINE
     units_required: Optional[int] = Field(1, ge=1, le=10)
     local_demand_score: Optional[float] = Field(0.5, ge=0, le=1)
-    
-    @validator('request_date')
-    def validate_request_date(cls, v):
-        try:
-            datetime.fromisoformat(v)
-            return v
-        except ValueError:
-            raise ValueError('Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)')
 
 class DemandForecastRequest(BaseModel):
     """Request schema for demand forecasting"""
-    forecast_date: Optional[str] = Field(default_factory=lambda: datetime.now().isoformat())
+    model_config = _SCHEMA_CONFIG
+    
+    forecast_date: Optional[datetime] = Field(default_factory=datetime.now)
     forecast_days: Optional[int] = Field(7, ge=1, le=365)
     blood_type: Optional[BloodType] = None
     hospital_id: Optional[str] = None
@@ -127,17 +157,11 @@ class DemandForecastRequest(BaseModel):
     population_served: Optional[int] = Field(50000, ge=1000)
     emergency_events: Optional[int] = Field(0, ge=0)
     current_inventory: Optional[int] = Field(0, ge=0)
-    
-    @validator('forecast_date')
-    def validate_forecast_date(cls, v):
-        try:
-            datetime.fromisoformat(v)
-            return v
-        except ValueError:
-            raise ValueError('Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)')
 
 class CompatibilityRequest(BaseModel):
     """Request schema for compatibility assessment"""
+    model_config = _SCHEMA_CONFIG
+    
     donor: DonorSchema
     patient: PatientSchema
     urgency_level: UrgencyLevel = UrgencyLevel.ROUTINE
@@ -148,8 +172,10 @@ class CompatibilityRequest(BaseModel):
 
 class RiskAssessmentRequest(BaseModel):
     """Request schema for risk assessment"""
-    assessment_type: str = Field(..., regex="^(donation|transfusion)$", description="Type of assessment")
-    subject: Union[DonorSchema, PatientSchema] = Field(..., description="Subject being assessed")
+    model_config = _SCHEMA_CONFIG
+    
+    assessment_type: Literal["donation", "transfusion"] = Field(..., description="Type of assessment")
+    subject: Subject = Field(..., description="Subject being assessed")
     urgency_level: UrgencyLevel = UrgencyLevel.ROUTINE
     units_required: Optional[int] = Field(1, ge=1, le=10)
     emergency_procedure: Optional[bool] = Field(False, description="Emergency procedure indicator")
@@ -163,43 +189,72 @@ class RiskAssessmentRequest(BaseModel):
 # Response schemas
 class PredictionResponse(BaseModel):
     """Generic prediction response schema"""
+    model_config = _SCHEMA_CONFIG
+    
     prediction_type: str = Field(..., description="Type of prediction")
     result: Dict[str, Any] = Field(..., description="Prediction results")
     confidence: float = Field(..., ge=0, le=1, description="Prediction confidence score")
     model_version: str = Field(..., description="Model version used")
-    timestamp: Optional[str] = Field(default_factory=lambda: datetime.now().isoformat())
+    timestamp: Optional[datetime] = Field(default_factory=datetime.now)
     processing_time_ms: Optional[float] = Field(None, ge=0, description="Processing time in milliseconds")
     
-    @validator('timestamp')
-    def validate_timestamp(cls, v):
-        try:
-            datetime.fromisoformat(v)
-            return v
-        except ValueError:
-            raise ValueError('Invalid timestamp format')
+    @classmethod
+    def make(cls, prediction_type: str, result: Dict[str, Any], confidence: float, model_version: str,
+             processing_time_ms: Optional[float] = None) -> "PredictionResponse":
+        """Build a response from trusted model output, skipping validation"""
+        return cls.model_construct(prediction_type=prediction_type, result=result, confidence=confidence,
+                                   model_version=model_version, timestamp=datetime.now(),
+                                   processing_time_ms=processing_time_ms)
 
 class ErrorResponse(BaseModel):
     """Error response schema"""
+    model_config = _DEFERRED_SCHEMA_CONFIG
+    
     error: str = Field(..., description="Error type")
     message: str = Field(..., description="Error message")
     details: Optional[Dict[str, Any]] = Field(None, description="Additional error details")
-    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
+    timestamp: datetime = Field(default_factory=datetime.now)
     request_id: Optional[str] = Field(None, description="Request identifier for tracking")
 
 class HealthCheckResponse(BaseModel):
     """Health check response schema"""
+    model_config = _DEFERRED_SCHEMA_CONFIG
+    
     status: str = Field(..., description="Service status")
     service: str = Field(..., description="Service name")
     version: str = Field(..., description="Service version")
     models_loaded: int = Field(..., ge=0, description="Number of loaded models")
-    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
+    timestamp: datetime = Field(default_factory=datetime.now)
     uptime_seconds: Optional[float] = Field(None, ge=0, description="Service uptime in seconds")
+    
+    @classmethod
+    def make(cls, status: str, service: str, version: str, models_loaded: int,
+             uptime_seconds: Optional[float] = None) -> "HealthCheckResponse":
+        """Build a health check response from service state, skipping validation"""
+        return cls.model_construct(status=status, service=service, version=version, models_loaded=models_loaded,
+                                   timestamp=datetime.now(), uptime_seconds=uptime_seconds)
 
 class ModelMetricsResponse(BaseModel):
     """Model metrics response schema"""
+    model_config = _DEFERRED_SCHEMA_CONFIG
+    
     model: str = Field(..., description="Model name")
     version: str = Field(..., description="Model version")
     metrics: Dict[str, float] = Field(..., description="Model performance metrics")
     last_trained: Optional[str] = Field(None, description="Last training timestamp")
     training_samples: Optional[int] = Field(None, ge=0, description="Number of training samples")
     validation_samples: Optional[int] = Field(None, ge=0, description="Number of validation samples")
+    
+    @classmethod
+    def make(cls, model: str, version: str, metrics: Dict[str, float], last_trained: Optional[str] = None,
+             training_samples: Optional[int] = None, validation_samples: Optional[int] = None) -> "ModelMetricsResponse":
+        """Build a metrics response from a trained model's own metrics, skipping validation"""
+        return cls.model_construct(model=model, version=version, metrics=metrics, last_trained=last_trained,
+                                   training_samples=training_samples, validation_samples=validation_samples)
+
+# Request validators, built once at import. Handlers validate raw request bodies with
+# e.g. DONOR_PREDICTION_ADAPTER.validate_json(body), going straight from bytes to the model
+DONOR_PREDICTION_ADAPTER = TypeAdapter(DonorPredictionRequest)
+DEMAND_FORECAST_ADAPTER = TypeAdapter(DemandForecastRequest)
+COMPATIBILITY_ADAPTER = TypeAdapter(CompatibilityRequest)
+RISK_ASSESSMENT_ADAPTER = TypeAdapter(RiskAssessmentRequest)
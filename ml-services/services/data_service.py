@@ -3,12 +3,68 @@ import logging
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
 import os
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from utils.blood_types import compatible_mask, encode_blood_types
+
 logger = logging.getLogger(__name__)
 
+# When pyarrow is installed, training data files are cached as zstd Parquet (columnar, multithreaded
+# decode) and held in memory as Arrow tables; otherwise as CSV files and DataFrames
+_HAVE_PYARROW = pa is not None
+
+# Compact column types for the donor table, instead of inferring int64/float64/object on every read
+DONOR_DTYPES = {
+    'age': 'int16', 'weight': 'float32', 'height': 'float32', 'donation_count': 'int16',
+    'days_since_last_donation': 'float32', 'health_score': 'float32', 'reliability_score': 'float32',
+    'response_time_hours': 'float32', 'latitude': 'float32', 'longitude': 'float32', 'available': 'int8',
+    'blood_type': 'category', 'gender': 'category'
+}
+
+_TRAINING_DTYPES = {'donor_training_data': DONOR_DTYPES}
+
+# Categorical columns are sampled by binary-searching uniform draws in a precomputed CDF, which is
+# normalized once and has its last entry pinned to exactly 1
+def _categorical_cdf(p) -> np.ndarray:
+    """Cumulative distribution for sampling with _sample_categorical"""
+    cdf = np.cumsum(np.asarray(p, dtype=np.float64) / np.sum(p))
+    cdf[-1] = 1.0
+    return cdf
+
+def _sample_categorical(rng: np.random.Generator, values: np.ndarray, cdf: np.ndarray, n_samples: int) -> np.ndarray:
+    """Draw n_samples values according to a CDF from _categorical_cdf"""
+    return values[np.searchsorted(cdf, rng.random(n_samples), side='right')]
+
+# Population blood type distribution for synthetic donors and requests
+_SYNTHETIC_BLOOD_TYPES = np.array(['O_POSITIVE', 'A_POSITIVE', 'B_POSITIVE', 'AB_POSITIVE',
+                                   'O_NEGATIVE', 'A_NEGATIVE', 'B_NEGATIVE', 'AB_NEGATIVE'])
+_BLOOD_TYPE_CDF = _categorical_cdf([0.36, 0.36, 0.12, 0.06, 0.06, 0.02, 0.01, 0.01])
+
+_GENDERS = np.array(['male', 'female'])
+_GENDER_CDF = _categorical_cdf([0.6, 0.4])
+
+_URGENCY_LEVELS = np.arange(1, 6)
+_URGENCY_CDF = _categorical_cdf([0.3, 0.3, 0.2, 0.15, 0.05])
+
+_PROCEDURE_TYPES = np.array(['surgery', 'emergency', 'chronic_treatment', 'trauma'])
+_PROCEDURE_CDF = _categorical_cdf([0.4, 0.2, 0.3, 0.1])
+
+# log1p of donation counts, which are small Poisson draws; counts past the table are clamped to its end
+_LOG1P_LUT = np.log1p(np.arange(64, dtype=np.float32))
+
+def _id_column(prefix: str, numbers: np.ndarray, width: int) -> np.ndarray:
+    """Zero-padded string ids such as D000042 for a whole array of numbers at once"""
+    return np.char.add(prefix, np.char.zfill(numbers.astype(f'U{width}'), width))
+
 class DataService:
     """
     Service for managing data operations for ML models:
@@ -40,28 +96,7 @@ class DataService:
     async def get_donor_training_data(self) -> pd.DataFrame:
         """Get training data for donor availability prediction"""
         try:
-            # Check cache first
-            cache_key = "donor_training_data"
-            if self._is_cache_valid(cache_key):
-                return self.data_cache[cache_key]['data']
-            
-            # Try to load from file
-            data_file = f"{self.data_dir}/processed/donor_training_data.csv"
-            if os.path.exists(data_file):
-                data = pd.read_csv(data_file)
-                self._cache_data(cache_key, data)
-                return data
-            
-            # Generate synthetic data if no real data available
-            logger.info("No donor training data found, generating synthetic data")
-            data = await self._generate_synthetic_donor_data(1000)
-            
-            # Save synthetic data
-            data.to_csv(data_file, index=False)
-            self._cache_data(cache_key, data)
-            
-            return data
-            
+            return await self._get_training_data("donor_training_data", self._generate_synthetic_donor_data, 1000)
         except Exception as e:
             logger.error(f"Failed to get donor training data: {e}")
             raise
@@ -69,24 +104,7 @@ class DataService:
     async def get_demand_training_data(self) -> pd.DataFrame:
         """Get training data for demand forecasting"""
         try:
-            cache_key = "demand_training_data"
-            if self._is_cache_valid(cache_key):
-                return self.data_cache[cache_key]['data']
-            
-            data_file = f"{self.data_dir}/processed/demand_training_data.csv"
-            if os.path.exists(data_file):
-                data = pd.read_csv(data_file)
-                self._cache_data(cache_key, data)
-                return data
-            
-            logger.info("No demand training data found, generating synthetic data")
-            data = await self._generate_synthetic_demand_data(500)
-            
-            data.to_csv(data_file, index=False)
-            self._cache_data(cache_key, data)
-            
-            return data
-            
+            return await self._get_training_data("demand_training_data", self._generate_synthetic_demand_data, 500)
         except Exception as e:
             logger.error(f"Failed to get demand training data: {e}")
             raise
@@ -94,24 +112,7 @@ class DataService:
     async def get_compatibility_training_data(self) -> pd.DataFrame:
         """Get training data for compatibility matching"""
         try:
-            cache_key = "compatibility_training_data"
-            if self._is_cache_valid(cache_key):
-                return self.data_cache[cache_key]['data']
-            
-            data_file = f"{self.data_dir}/processed/compatibility_training_data.csv"
-            if os.path.exists(data_file):
-                data = pd.read_csv(data_file)
-                self._cache_data(cache_key, data)
-                return data
-            
-            logger.info("No compatibility training data found, generating synthetic data")
-            data = await self._generate_synthetic_compatibility_data(800)
-            
-            data.to_csv(data_file, index=False)
-            self._cache_data(cache_key, data)
-            
-            return data
-            
+            return await self._get_training_data("compatibility_training_data", self._generate_synthetic_compatibility_data, 800)
         except Exception as e:
             logger.error(f"Failed to get compatibility training data: {e}")
             raise
@@ -119,192 +120,189 @@ class DataService:
     async def get_risk_training_data(self) -> pd.DataFrame:
         """Get training data for risk assessment"""
         try:
-            cache_key = "risk_training_data"
-            if self._is_cache_valid(cache_key):
-                return self.data_cache[cache_key]['data']
-            
-            data_file = f"{self.data_dir}/processed/risk_training_data.csv"
-            if os.path.exists(data_file):
-                data = pd.read_csv(data_file)
-                self._cache_data(cache_key, data)
-                return data
-            
-            logger.info("No risk training data found, generating synthetic data")
-            data = await self._generate_synthetic_risk_data(1200)
-            
-            data.to_csv(data_file, index=False)
-            self._cache_data(cache_key, data)
-            
-            return data
-            
+            return await self._get_training_data("risk_training_data", self._generate_synthetic_risk_data, 1200)
         except Exception as e:
             logger.error(f"Failed to get risk training data: {e}")
             raise
     
-    async def _generate_synthetic_donor_data(self, n_samples: int) -> pd.DataFrame:
+    async def _get_training_data(self, cache_key: str, generate, n_samples: int) -> pd.DataFrame:
+        """Return a cached training dataset as a DataFrame, starting at most one load per key at a time"""
+        # The cache holds the load task itself, so callers arriving while it runs await the same
+        # read (or synthetic generation) instead of each starting their own
+        entry = self.data_cache.get(cache_key)
+        if entry is None or not self._is_cache_valid(cache_key):
+            entry = {
+                'data': asyncio.ensure_future(self._load_training_data(cache_key, generate, n_samples)),
+                'timestamp': datetime.now()
+            }
+            self.data_cache[cache_key] = entry
+        
+        try:
+            # Shielded so one cancelled caller does not cancel the load for the others
+            data = await asyncio.shield(entry['data'])
+        except Exception:
+            # Don't cache failures; the next caller retries
+            if self.data_cache.get(cache_key) is entry:
+                del self.data_cache[cache_key]
+            raise
+        
+        # The cached Arrow table is immutable and shared; each caller decodes its own DataFrame
+        return self._to_frame(cache_key, data)
+    
+    def _to_frame(self, name: str, data) -> pd.DataFrame:
+        """Decode a cached Arrow table to a DataFrame with the dataset's column types"""
+        if isinstance(data, pd.DataFrame):
+            return data
+        frame = data.to_pandas()
+        dtypes = _TRAINING_DTYPES.get(name)
+        # A no-op for tables written with these types; files from before they were set still get them
+        return frame.astype(dtypes) if dtypes else frame
+    
+    async def _load_training_data(self, name: str, generate, n_samples: int):
+        """Load a training dataset from file, generating and saving synthetic data if there is none.
+        Returns an Arrow table when pyarrow is installed, otherwise a DataFrame"""
+        data = await asyncio.to_thread(self._read_training_file, name)
+        if data is not None:
+            return data
+        
+        # Generate synthetic data if no real data available. Generation is CPU-bound NumPy/pandas
+        # work, so it runs in a worker thread rather than stalling the event loop
+        logger.info(f"No {name.replace('_', ' ')} found, generating synthetic data")
+        data = await asyncio.to_thread(generate, n_samples)
+        dtypes = _TRAINING_DTYPES.get(name)
+        if dtypes:
+            data = data.astype(dtypes)
+        if _HAVE_PYARROW:
+            data = await asyncio.to_thread(pa.Table.from_pandas, data, preserve_index=False)
+        
+        # Save synthetic data
+        await asyncio.to_thread(self._write_training_file, data, name)
+        return data
+    
+    def _generate_synthetic_donor_data(self, n_samples: int) -> pd.DataFrame:
         """Generate synthetic donor data for training"""
-        np.random.seed(42)
+        rng = np.random.default_rng(42)
         
-        # Blood types with realistic distribution
-        blood_types = ['O_POSITIVE', 'A_POSITIVE', 'B_POSITIVE', 'AB_POSITIVE',
-                      'O_NEGATIVE', 'A_NEGATIVE', 'B_NEGATIVE', 'AB_NEGATIVE']
-        blood_type_probs = [0.37, 0.36, 0.12, 0.06, 0.06, 0.02, 0.01, 0.01]
+        age = np.clip(rng.normal(35, 12, n_samples), 18, 65).astype(int)
+        # Older donors might be less available
+        age_factor = (age - 18) / (65 - 18)
         
         data = {
-            'donor_id': [f"D{i:06d}" for i in range(n_samples)],
-            'age': np.clip(np.random.normal(35, 12, n_samples), 18, 65).astype(int),
-            'gender': np.random.choice(['male', 'female'], n_samples, p=[0.6, 0.4]),
-            'weight': np.clip(np.random.normal(70, 15, n_samples), 50, 120),
-            'height': np.clip(np.random.normal(170, 10, n_samples), 150, 200),
-            'blood_type': np.random.choice(blood_types, n_samples, p=blood_type_probs),
-            'donation_count': np.random.poisson(5, n_samples),
-            'days_since_last_donation': np.random.exponential(90, n_samples),
-            'health_score': np.random.beta(8, 2, n_samples),  # Skewed towards healthy
-            'reliability_score': np.random.beta(7, 3, n_samples),
-            'response_time_hours': np.random.exponential(12, n_samples),
-            'available': np.random.binomial(1, 0.7, n_samples),
-            'latitude': np.random.uniform(12.0, 35.0, n_samples),  # India coordinates
-            'longitude': np.random.uniform(68.0, 97.0, n_samples),
-            'created_at': [
-                (datetime.now() - timedelta(days=np.random.randint(0, 365))).isoformat()
-                for _ in range(n_samples)
-            ]
+            'donor_id': _id_column('D', np.arange(n_samples), 6),
+            'age': age,
+            'gender': _sample_categorical(rng, _GENDERS, _GENDER_CDF, n_samples),
+            'weight': np.clip(rng.normal(70, 15, n_samples), 50, 120),
+            'height': np.clip(rng.normal(170, 10, n_samples), 150, 200),
+            'blood_type': _sample_categorical(rng, _SYNTHETIC_BLOOD_TYPES, _BLOOD_TYPE_CDF, n_samples),  # Blood types with realistic distribution
+            'donation_count': rng.poisson(5, n_samples),
+            'days_since_last_donation': rng.exponential(90, n_samples),
+            'health_score': rng.beta(8, 2, n_samples),  # Skewed towards healthy
+            'reliability_score': rng.beta(7, 3, n_samples),
+            'response_time_hours': rng.exponential(12, n_samples),
+            'available': (rng.random(n_samples) < (0.8 - 0.3 * age_factor)).astype(np.int8),
+            'latitude': rng.uniform(12.0, 35.0, n_samples),  # India coordinates
+            'longitude': rng.uniform(68.0, 97.0, n_samples),
+            # Kept as datetime64 rather than ISO strings; Parquet stores it natively
+            'created_at': np.datetime64(datetime.now(), 's') - rng.integers(0, 365, n_samples).astype('timedelta64[D]')
         }
         
         df = pd.DataFrame(data)
         
         # Add some realistic correlations
-        # Older donors might be less available
-        age_factor = (df['age'] - 18) / (65 - 18)
-        df['available'] = np.where(
-            np.random.random(n_samples) < (0.8 - 0.3 * age_factor),
-            1, 0
-        )
-        
         # More experienced donors (higher donation count) are more reliable
         df['reliability_score'] = np.clip(
-            df['reliability_score'] + 0.1 * np.log1p(df['donation_count']),
+            df['reliability_score'] + 0.1 * _LOG1P_LUT[np.minimum(df['donation_count'].to_numpy(), len(_LOG1P_LUT) - 1)],
             0, 1
         )
         
         return df
     
-    async def _generate_synthetic_demand_data(self, n_samples: int) -> pd.DataFrame:
+    def _generate_synthetic_demand_data(self, n_samples: int) -> pd.DataFrame:
         """Generate synthetic demand data for training"""
-        np.random.seed(42)
+        rng = np.random.default_rng(42)
         
         # Generate date range
-        start_date = datetime.now() - timedelta(days=n_samples)
-        dates = [start_date + timedelta(days=i) for i in range(n_samples)]
+        start_date = np.datetime64(datetime.now(), 'us') - np.timedelta64(n_samples, 'D')
+        dates = start_date + np.arange(n_samples).astype('timedelta64[D]')
+        day_of_year = (dates.astype('datetime64[D]') - dates.astype('datetime64[Y]')).astype(np.int32) + 1
+        
+        urgency_level = _sample_categorical(rng, _URGENCY_LEVELS, _URGENCY_CDF, n_samples)
+        # Higher urgency should correlate with lower fulfillment rate
+        urgency_factor = (urgency_level - 1) / 4
         
         data = {
             'date': dates,
-            'hospital_id': [f"H{np.random.randint(1, 21):03d}" for _ in range(n_samples)],
-            'blood_type': np.random.choice(
-                ['O_POSITIVE', 'A_POSITIVE', 'B_POSITIVE', 'AB_POSITIVE',
-                 'O_NEGATIVE', 'A_NEGATIVE', 'B_NEGATIVE', 'AB_NEGATIVE'],
-                n_samples,
-                p=[0.37, 0.36, 0.12, 0.06, 0.06, 0.02, 0.01, 0.01]
-            ),
-            'units_requested': np.random.poisson(8, n_samples),
-            'urgency_level': np.random.choice([1, 2, 3, 4, 5], n_samples, p=[0.3, 0.3, 0.2, 0.15, 0.05]),
-            'patient_age': np.random.normal(45, 20, n_samples),
-            'procedure_type': np.random.choice(
-                ['surgery', 'emergency', 'chronic_treatment', 'trauma'],
-                n_samples,
-                p=[0.4, 0.2, 0.3, 0.1]
-            ),
-            'hospital_capacity': np.random.normal(200, 50, n_samples),
-            'current_inventory': np.random.poisson(15, n_samples),
-            'seasonal_factor': [1 + 0.2 * np.sin(2 * np.pi * d.timetuple().tm_yday / 365) for d in dates],
-            'fulfilled': np.random.binomial(1, 0.85, n_samples)
+            'hospital_id': _id_column('H', rng.integers(1, 21, n_samples), 3),
+            'blood_type': _sample_categorical(rng, _SYNTHETIC_BLOOD_TYPES, _BLOOD_TYPE_CDF, n_samples),
+            'units_requested': rng.poisson(8, n_samples),
+            'urgency_level': urgency_level,
+            'patient_age': rng.normal(45, 20, n_samples),
+            'procedure_type': _sample_categorical(rng, _PROCEDURE_TYPES, _PROCEDURE_CDF, n_samples),
+            'hospital_capacity': rng.normal(200, 50, n_samples),
+            'current_inventory': rng.poisson(15, n_samples),
+            'seasonal_factor': 1 + 0.2 * np.sin(2 * np.pi * day_of_year / 365),
+            'fulfilled': (rng.random(n_samples) < (0.95 - 0.2 * urgency_factor)).astype(np.int8)
         }
         
-        df = pd.DataFrame(data)
-        
-        # Add realistic correlations
-        # Higher urgency should correlate with lower fulfillment rate
-        urgency_factor = (df['urgency_level'] - 1) / 4
-        df['fulfilled'] = np.where(
-            np.random.random(n_samples) < (0.95 - 0.2 * urgency_factor),
-            1, 0
-        )
-        
-        return df
+        return pd.DataFrame(data)
     
-    async def _generate_synthetic_compatibility_data(self, n_samples: int) -> pd.DataFrame:
+    def _generate_synthetic_compatibility_data(self, n_samples: int) -> pd.DataFrame:
         """Generate synthetic compatibility data for training"""
-        np.random.seed(42)
+        rng = np.random.default_rng(42)
         
-        blood_types = ['O_POSITIVE', 'A_POSITIVE', 'B_POSITIVE', 'AB_POSITIVE',
-                      'O_NEGATIVE', 'A_NEGATIVE', 'B_NEGATIVE', 'AB_NEGATIVE']
+        # Uniform over all pairings, so every compatibility case is well represented
+        blood_types = _SYNTHETIC_BLOOD_TYPES
         
         data = {
-            'match_id': [f"M{i:06d}" for i in range(n_samples)],
-            'donor_blood_type': np.random.choice(blood_types, n_samples),
-            'patient_blood_type': np.random.choice(blood_types, n_samples),
-            'donor_age': np.random.normal(35, 12, n_samples),
-            'patient_age': np.random.normal(45, 20, n_samples),
-            'distance_km': np.random.exponential(25, n_samples),
-            'urgency_level': np.random.choice([1, 2, 3, 4, 5], n_samples),
-            'donor_health_score': np.random.beta(8, 2, n_samples),
-            'patient_condition_severity': np.random.beta(3, 7, n_samples),
-            'time_to_procedure_hours': np.random.exponential(24, n_samples),
-            'successful_match': np.random.binomial(1, 0.75, n_samples)
+            'match_id': _id_column('M', np.arange(n_samples), 6),
+            'donor_blood_type': blood_types[rng.integers(0, len(blood_types), n_samples)],
+            'patient_blood_type': blood_types[rng.integers(0, len(blood_types), n_samples)],
+            'donor_age': rng.normal(35, 12, n_samples),
+            'patient_age': rng.normal(45, 20, n_samples),
+            'distance_km': rng.exponential(25, n_samples),
+            'urgency_level': rng.integers(1, 6, n_samples),
+            'donor_health_score': rng.beta(8, 2, n_samples),
+            'patient_condition_severity': rng.beta(3, 7, n_samples),
+            'time_to_procedure_hours': rng.exponential(24, n_samples),
+            'successful_match': rng.binomial(1, 0.75, n_samples)
         }
         
-        df = pd.DataFrame(data)
-        
-        # Add blood type compatibility logic
-        compatibility_matrix = {
-            'O_NEGATIVE': blood_types,  # Universal donor
-            'O_POSITIVE': ['O_POSITIVE', 'A_POSITIVE', 'B_POSITIVE', 'AB_POSITIVE'],
-            'A_NEGATIVE': ['A_NEGATIVE', 'A_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'],
-            'A_POSITIVE': ['A_POSITIVE', 'AB_POSITIVE'],
-            'B_NEGATIVE': ['B_NEGATIVE', 'B_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'],
-            'B_POSITIVE': ['B_POSITIVE', 'AB_POSITIVE'],
-            'AB_NEGATIVE': ['AB_NEGATIVE', 'AB_POSITIVE'],
-            'AB_POSITIVE': ['AB_POSITIVE']
-        }
+        # Adjust success rate based on blood type compatibility, for all rows at once
+        is_compatible = compatible_mask(encode_blood_types(data['donor_blood_type']),
+                                        encode_blood_types(data['patient_blood_type']))
+        r = rng.random(n_samples)
+        data['successful_match'] = np.where(
+            is_compatible,
+            # Compatible blood types have higher success rate
+            np.where(r < 0.9, 1, data['successful_match']),
+            # Incompatible blood types have very low success rate
+            (r < 0.1).astype(int)
+        )
         
-        # Adjust success rate based on blood type compatibility
-        for i in range(n_samples):
-            donor_type = df.iloc[i]['donor_blood_type']
-            patient_type = df.iloc[i]['patient_blood_type']
-            
-            if patient_type in compatibility_matrix.get(donor_type, []):
-                # Compatible blood types have higher success rate
-                if np.random.random() < 0.9:
-                    df.iloc[i, df.columns.get_loc('successful_match')] = 1
-            else:
-                # Incompatible blood types have very low success rate
-                if np.random.random() < 0.1:
-                    df.iloc[i, df.columns.get_loc('successful_match')] = 1
-                else:
-                    df.iloc[i, df.columns.get_loc('successful_match')] = 0
+        df = pd.DataFrame(data)
         
         return df
     
-    async def _generate_synthetic_risk_data(self, n_samples: int) -> pd.DataFrame:
+    def _generate_synthetic_risk_data(self, n_samples: int) -> pd.DataFrame:
         """Generate synthetic risk assessment data for training"""
-        np.random.seed(42)
+        rng = np.random.default_rng(42)
         
         data = {
-            'assessment_id': [f"R{i:06d}" for i in range(n_samples)],
-            'subject_age': np.random.normal(40, 18, n_samples),
-            'subject_weight': np.random.normal(70, 15, n_samples),
-            'chronic_conditions_count': np.random.poisson(1.5, n_samples),
-            'medications_count': np.random.poisson(2, n_samples),
-            'allergies_count': np.random.poisson(0.5, n_samples),
-            'bp_systolic': np.random.normal(130, 20, n_samples),
-            'bp_diastolic': np.random.normal(80, 10, n_samples),
-            'heart_rate': np.random.normal(75, 15, n_samples),
-            'hemoglobin': np.random.normal(14, 2, n_samples),
-            'previous_adverse_reactions': np.random.binomial(1, 0.1, n_samples),
-            'emergency_procedure': np.random.binomial(1, 0.2, n_samples),
-            'facility_risk_score': np.random.beta(2, 8, n_samples),  # Most facilities are low risk
-            'staff_experience_score': np.random.beta(8, 2, n_samples),  # Most staff are experienced
-            'high_risk_outcome': np.random.binomial(1, 0.25, n_samples)
+            'assessment_id': _id_column('R', np.arange(n_samples), 6),
+            'subject_age': rng.normal(40, 18, n_samples),
+            'subject_weight': rng.normal(70, 15, n_samples),
+            'chronic_conditions_count': rng.poisson(1.5, n_samples),
+            'medications_count': rng.poisson(2, n_samples),
+            'allergies_count': rng.poisson(0.5, n_samples),
+            'bp_systolic': rng.normal(130, 20, n_samples),
+            'bp_diastolic': rng.normal(80, 10, n_samples),
+            'heart_rate': rng.normal(75, 15, n_samples),
+            'hemoglobin': rng.normal(14, 2, n_samples),
+            'previous_adverse_reactions': rng.binomial(1, 0.1, n_samples),
+            'emergency_procedure': rng.binomial(1, 0.2, n_samples),
+            'facility_risk_score': rng.beta(2, 8, n_samples),  # Most facilities are low risk
+            'staff_experience_score': rng.beta(8, 2, n_samples),  # Most staff are experienced
+            'high_risk_outcome': rng.binomial(1, 0.25, n_samples)
         }
         
         df = pd.DataFrame(data)
@@ -331,12 +329,32 @@ class DataService:
         
         # Adjust outcomes based on total risk
         df['high_risk_outcome'] = np.where(
-            np.random.random(n_samples) < total_risk,
+            rng.random(n_samples) < total_risk,
             1, 0
         )
         
         return df
     
+    def _read_training_file(self, name: str):
+        """Load a processed training data file, preferring Parquet over CSV; None if neither exists.
+        Returns an Arrow table when pyarrow is installed, otherwise a DataFrame"""
+        parquet_file = f"{self.data_dir}/processed/{name}.parquet"
+        if _HAVE_PYARROW and os.path.exists(parquet_file):
+            return pq.read_table(parquet_file, memory_map=True)
+        
+        csv_file = f"{self.data_dir}/processed/{name}.csv"
+        if os.path.exists(csv_file):
+            data = pd.read_csv(csv_file, dtype=_TRAINING_DTYPES.get(name), engine="pyarrow" if _HAVE_PYARROW else "c")
+            return pa.Table.from_pandas(data, preserve_index=False) if _HAVE_PYARROW else data
+        return None
+    
+    def _write_training_file(self, data, name: str):
+        """Save a processed training data file, as Parquet when pyarrow is available"""
+        if _HAVE_PYARROW:
+            pq.write_table(data, f"{self.data_dir}/processed/{name}.parquet", compression="zstd")
+        else:
+            data.to_csv(f"{self.data_dir}/processed/{name}.csv", index=False)
+    
     def _is_cache_valid(self, cache_key: str) -> bool:
         """Check if cached data is still valid"""
         if cache_key not in self.data_cache:
@@ -345,13 +363,6 @@ class DataService:
         cache_time = self.data_cache[cache_key]['timestamp']
         return (datetime.now() - cache_time).total_seconds() < self.cache_ttl
     
-    def _cache_data(self, cache_key: str, data: pd.DataFrame):
-        """Cache data with timestamp"""
-        self.data_cache[cache_key] = {
-            'data': data,
-            'timestamp': datetime.now()
-        }
-    
     async def clear_cache(self):
         """Clear data cache"""
         self.data_cache.clear()
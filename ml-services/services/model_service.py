@@ -47,6 +47,21 @@ class ModelService:
             logger.error(f"Failed to load models: {e}")
             raise
     
+    async def warmup(self, model_instances: Dict[str, Any]):
+        """Load or train every model up front so no request pays the training cost"""
+        names = [name for name, instance in model_instances.items() if hasattr(instance, 'ensure_loaded')]
+        results = await asyncio.gather(
+            *(model_instances[name].ensure_loaded() for name in names),
+            return_exceptions=True
+        )
+        
+        # A model that fails here is retried lazily on its first request
+        for model_name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to warm up model {model_name}: {result}")
+        
+        logger.info(f"Warmed up {len(names)} model instances")
+    
     async def _load_model_if_exists(self, model_name: str, model_instance: Any):
         """Load a specific model if it exists"""
         try:
@@ -57,11 +72,14 @@ class ModelService:
                 latest_file = max(model_files, key=lambda x: os.path.getmtime(x))
                 
                 # Load model data
-                model_data = joblib.load(latest_file)
+                # Read-only memory map, shared between workers; see SavedModel.load_model
+                model_data = joblib.load(latest_file, mmap_mode='r')
                 
                 # Update model instance
                 if hasattr(model_instance, 'model'):
                     model_instance.model = model_data.get('model')
+                if hasattr(model_instance, 'compiled_model'):
+                    model_instance.compiled_model = None  # Stale once the sklearn model is replaced
                 if hasattr(model_instance, 'scaler'):
                     model_instance.scaler = model_data.get('scaler')
                 if hasattr(model_instance, 'metrics'):
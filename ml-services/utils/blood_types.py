@@ -0,0 +1,77 @@
+import numpy as np
+from enum import IntEnum
+from typing import Dict, Tuple, Union
+
+# Canonical blood type order, shared by the integer encodings used across models
+BLOOD_TYPES: Tuple[str, ...] = (
+    'A_POSITIVE', 'A_NEGATIVE', 'B_POSITIVE', 'B_NEGATIVE',
+    'AB_POSITIVE', 'AB_NEGATIVE', 'O_POSITIVE', 'O_NEGATIVE'
+)
+
+BLOOD_TYPE_IDX: Dict[str, int] = {blood_type: i for i, blood_type in enumerate(BLOOD_TYPES)}
+
+class BloodTypeCode(IntEnum):
+    """Integer blood type codes, indexing BLOOD_TYPES and COMPAT_MASK"""
+    A_POSITIVE = 0
+    A_NEGATIVE = 1
+    B_POSITIVE = 2
+    B_NEGATIVE = 3
+    AB_POSITIVE = 4
+    AB_NEGATIVE = 5
+    O_POSITIVE = 6
+    O_NEGATIVE = 7
+
+# Accepts both names (including the schemas' str-valued BloodType) and integer codes, so
+# callers that already hold codes skip string hashing entirely
+_CODE_LOOKUP: Dict[Union[str, int], int] = {**BLOOD_TYPE_IDX, **{int(code): int(code) for code in BloodTypeCode}}
+
+# One-hot rows indexed by code, plus a trailing all-zero row so code -1 (unknown) encodes as zeros
+BLOOD_TYPE_ONE_HOT = np.vstack([np.eye(len(BLOOD_TYPES), dtype=np.float32),
+                                np.zeros(len(BLOOD_TYPES), dtype=np.float32)])
+BLOOD_TYPE_ONE_HOT.flags.writeable = False
+
+# Donor type -> patient types that can receive from it
+COMPATIBLE_RECIPIENTS: Dict[str, Tuple[str, ...]] = {
+    'O_NEGATIVE': ('O_NEGATIVE', 'O_POSITIVE', 'A_NEGATIVE', 'A_POSITIVE',
+                   'B_NEGATIVE', 'B_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'),
+    'O_POSITIVE': ('O_POSITIVE', 'A_POSITIVE', 'B_POSITIVE', 'AB_POSITIVE'),
+    'A_NEGATIVE': ('A_NEGATIVE', 'A_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'),
+    'A_POSITIVE': ('A_POSITIVE', 'AB_POSITIVE'),
+    'B_NEGATIVE': ('B_NEGATIVE', 'B_POSITIVE', 'AB_NEGATIVE', 'AB_POSITIVE'),
+    'B_POSITIVE': ('B_POSITIVE', 'AB_POSITIVE'),
+    'AB_NEGATIVE': ('AB_NEGATIVE', 'AB_POSITIVE'),
+    'AB_POSITIVE': ('AB_POSITIVE',)
+}
+
+def _build_compat_mask() -> np.ndarray:
+    """Pack the compatibility table into one recipient bitmask per donor type"""
+    mask = np.zeros(len(BLOOD_TYPES), dtype=np.uint8)
+    for donor_type, recipients in COMPATIBLE_RECIPIENTS.items():
+        for patient_type in recipients:
+            mask[BLOOD_TYPE_IDX[donor_type]] |= 1 << BLOOD_TYPE_IDX[patient_type]
+    return mask
+
+# Bit j of COMPAT_MASK[i] is set iff donor type i can give to patient type j
+COMPAT_MASK = _build_compat_mask()
+
+# The same table unpacked to COMPAT_TABLE[donor, patient] in {0, 1}, plus a trailing all-zero row
+# and column so code -1 (unknown) is never compatible; 81 bytes, indexed directly by code arrays
+COMPAT_TABLE = np.zeros((len(BLOOD_TYPES) + 1, len(BLOOD_TYPES) + 1), dtype=np.uint8)
+COMPAT_TABLE[:-1, :-1] = (COMPAT_MASK[:, None] >> np.arange(len(BLOOD_TYPES), dtype=np.uint8)) & 1
+COMPAT_TABLE.flags.writeable = False
+
+def to_blood_type_code(blood_type: Union[str, int, None]) -> int:
+    """Convert a blood type name or code to its integer code, or -1 if missing or unknown"""
+    return _CODE_LOOKUP.get(blood_type, -1)
+
+def encode_blood_types(blood_types) -> np.ndarray:
+    """Map blood type names or codes to indices into BLOOD_TYPES, with -1 for missing or unknown types"""
+    return np.array([_CODE_LOOKUP.get(blood_type, -1) for blood_type in blood_types], dtype=np.int8)
+
+def compatible_mask(donor_idx: np.ndarray, patient_idx: np.ndarray) -> np.ndarray:
+    """Vectorized compatibility test over arrays of encoded donor and patient types"""
+    return COMPAT_TABLE[donor_idx, patient_idx].view(bool)
+
+def is_compatible(donor_type: Union[str, int], patient_type: Union[str, int]) -> bool:
+    """Check whether a donor blood type can give to a patient blood type, given names or codes"""
+    return bool(COMPAT_TABLE[_CODE_LOOKUP.get(donor_type, -1), _CODE_LOOKUP.get(patient_type, -1)])
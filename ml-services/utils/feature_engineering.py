@@ -1,11 +1,24 @@
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+def gather_column(rows: List[Dict[str, Any]], key: str, default: float, dtype=np.float64) -> np.ndarray:
+    """Gather one numeric field across rows, substituting the default for missing values"""
+    return np.array([row.get(key) if row.get(key) is not None else default for row in rows], dtype=dtype)
+
+def calendar_columns(timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Split a datetime64 array into hour, weekday (0=Monday), month and day-of-month columns"""
+    days = timestamps.astype('datetime64[D]')
+    months = timestamps.astype('datetime64[M]')
+    hour = (timestamps - days).astype('timedelta64[h]').astype(np.int64)
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    month = months.astype(np.int64) % 12 + 1
+    day = (days - months).astype(np.int64) + 1
+    return hour, weekday, month, day
+
 class FeatureEngineer:
     """
     Feature engineering utilities for ML models
@@ -13,6 +26,7 @@ class FeatureEngineer:
     
     def __init__(self):
         self.holidays = self._get_indian_holidays()
+        self._holiday_keys = np.array([holiday.month * 100 + holiday.day for holiday in self.holidays])
     
     def extract_time_features(self, timestamp: datetime) -> List[float]:
         """Extract time-based features from timestamp"""
@@ -264,6 +278,10 @@ class FeatureEngineer:
             for holiday in self.holidays
         )
     
+    def is_holiday_batch(self, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+        """Vectorized holiday check over month and day-of-month columns"""
+        return np.isin(month * 100 + day, self._holiday_keys)
+    
     def normalize_features(self, features: np.ndarray, method: str = 'minmax') -> np.ndarray:
         """Normalize features using specified method"""
         try:
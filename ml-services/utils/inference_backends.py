@@ -0,0 +1,367 @@
+import os
+import sys
+import asyncio
+import importlib.util
+import logging
+import weakref
+import joblib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Compiled backend used for tree model inference: "onnx", "treelite", "quantized" or "sklearn" (no compilation)
+INFERENCE_BACKEND = os.getenv("ML_INFERENCE_BACKEND", "onnx")
+
+# Threads per ONNX Runtime session; requests are small, so extra threads mostly add synchronization cost
+ONNX_INTRA_OP_THREADS = int(os.getenv("ML_ONNX_THREADS", "1"))
+
+# Threads in the pool that runs predictions. Separate from asyncio's default executor so requests do
+# not queue behind model file I/O or training; scikit-learn and the compiled backends release the GIL
+INFERENCE_THREADS = int(os.getenv("ML_INFERENCE_THREADS", str(os.cpu_count() or 1)))
+
+# Threads per Treelite predictor, for the same reason as ONNX
+TREELITE_THREADS = int(os.getenv("ML_TREELITE_THREADS", "1"))
+
+# Compile Treelite libraries with thresholds quantized to per-feature bin indices. Smaller
+# libraries, but each prediction first bins its inputs, so it is opt-in
+TREELITE_QUANTIZE = os.getenv("ML_TREELITE_QUANTIZE", "0") == "1"
+
+# ONNX export and runtime are optional; without them models predict with scikit-learn. skl2onnx pulls
+# in scikit-learn, so it is only imported by export_onnx and serving processes that just load models skip it
+_HAVE_SKL2ONNX = importlib.util.find_spec("skl2onnx") is not None
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+# Treelite imports the forest and tl2cgen compiles it to a native shared library
+try:
+    import treelite
+    import tl2cgen
+except ImportError:
+    treelite = None
+    tl2cgen = None
+
+# Numba compiles the quantized forest kernel; the "quantized" backend is disabled without it
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+_inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="inference")
+
+async def run_inference(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking predict call in the inference pool, off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(_inference_executor, fn, *args)
+
+_LIB_SUFFIX = {'darwin': '.dylib', 'win32': '.dll'}.get(sys.platform, '.so')
+# Not ".joblib", so ModelService does not mistake quantized forests for saved models
+_QUANTIZED_SUFFIX = '.qforest'
+
+def export_onnx(model: Any, n_features: int, path: str) -> bool:
+    """Convert a fitted scikit-learn estimator to ONNX and write it to path"""
+    if not _HAVE_SKL2ONNX:
+        return False
+
+    try:
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+        # Emit class probabilities as a plain (N, n_classes) tensor instead of a list of dicts
+        options = {id(model): {'zipmap': False}} if hasattr(model, 'predict_proba') else None
+        onnx_model = convert_sklearn(
+            model,
+            initial_types=[('X', FloatTensorType([None, n_features]))],
+            options=options
+        )
+        with open(path, 'wb') as f:
+            f.write(onnx_model.SerializeToString())
+        logger.info(f"ONNX model exported to {path}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to export ONNX model: {e}")
+        return False
+
+class OnnxModel:
+    """
+    ONNX Runtime session exposing the scikit-learn predict/predict_proba API
+    """
+
+    def __init__(self, path: str):
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+        self.session = onnxruntime.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_names = [output.name for output in self.session.get_outputs()]
+
+    def _run(self, output_name: str, X: np.ndarray) -> np.ndarray:
+        return self.session.run([output_name], {self.input_name: X.astype(np.float32, copy=False)})[0]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predicted labels (classifiers) or values (regressors), one per row"""
+        return self._run(self.output_names[0], X).ravel()
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities, shape (N, n_classes)"""
+        return self._run(self.output_names[1], X)
+
+def load_onnx(path: str) -> Optional[OnnxModel]:
+    """Load an exported model, or return None if ONNX Runtime or the file is unavailable"""
+    if onnxruntime is None or not os.path.exists(path):
+        return None
+
+    try:
+        model = OnnxModel(path)
+        logger.info(f"ONNX model loaded from {path}")
+        return model
+    except Exception as e:
+        logger.error(f"Failed to load ONNX model from {path}: {e}")
+        return None
+
+def export_treelite(model: Any, path: str) -> bool:
+    """Compile a fitted scikit-learn forest to a native shared library at path"""
+    if treelite is None:
+        return False
+
+    try:
+        tl_model = treelite.sklearn.import_model(model)
+        params = {'parallel_comp': 32, 'quantize': 1 if TREELITE_QUANTIZE else 0}
+        tl2cgen.export_lib(tl_model, toolchain='gcc', libpath=path, params=params)
+        logger.info(f"Treelite library compiled to {path}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to compile Treelite library: {e}")
+        return False
+
+class TreeliteModel:
+    """
+    Compiled Treelite forest exposing the scikit-learn predict/predict_proba API
+    """
+
+    def __init__(self, path: str):
+        self.predictor = tl2cgen.Predictor(path, nthread=TREELITE_THREADS)
+
+    def _run(self, X: np.ndarray) -> np.ndarray:
+        # Output is (N, n_targets, n_classes); this service only has single-target models
+        output = self.predictor.predict(tl2cgen.DMatrix(X.astype(np.float32, copy=False)))
+        return output.reshape(len(X), -1)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predicted class indices (classifiers) or values (regressors), one per row"""
+        output = self._run(X)
+        return output.argmax(axis=1) if output.shape[1] > 1 else output.ravel()
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities, shape (N, n_classes)"""
+        output = self._run(X)
+        if output.shape[1] == 1:
+            # Binary gradient boosting models output only the positive class probability
+            return np.hstack([1 - output, output])
+        return output
+
+def load_treelite(path: str) -> Optional[TreeliteModel]:
+    """Load a compiled library, or return None if tl2cgen or the file is unavailable"""
+    if tl2cgen is None or not os.path.exists(path):
+        return None
+
+    try:
+        model = TreeliteModel(path)
+        logger.info(f"Treelite library loaded from {path}")
+        return model
+    except Exception as e:
+        logger.error(f"Failed to load Treelite library from {path}: {e}")
+        return None
+
+def _quantized_forest_kernel(X, edges, edge_offsets, roots, feature, threshold_bin, left, right, value):
+    """Average leaf values over all trees, walking each tree on binned rather than raw feature values"""
+    n_rows, n_features = X.shape
+    n_trees = roots.shape[0]
+    n_outputs = value.shape[1]
+    out = np.zeros((n_rows, n_outputs))
+    for i in prange(n_rows):
+        # Bin of x is the number of split thresholds strictly below it, so x <= t_j iff bin(x) <= j
+        x_bin = np.empty(n_features, dtype=np.int32)
+        for f in range(n_features):
+            x_bin[f] = np.searchsorted(edges[edge_offsets[f]:edge_offsets[f + 1]], X[i, f])
+        for t in range(n_trees):
+            node = roots[t]
+            while left[node] != -1:
+                if x_bin[feature[node]] <= threshold_bin[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+            for k in range(n_outputs):
+                out[i, k] += value[node, k]
+        for k in range(n_outputs):
+            out[i, k] /= n_trees
+    return out
+
+if njit is not None:
+    _quantized_forest_kernel = njit(parallel=True, cache=True)(_quantized_forest_kernel)
+
+def quantize_forest(model: Any) -> Dict[str, np.ndarray]:
+    """
+    Flatten a fitted scikit-learn forest into node arrays with per-feature quantized thresholds.
+
+    Each feature's sorted unique split thresholds become its bin edges, so thresholds are stored as
+    uint8 bin indices (uint16 past 255 distinct splits) and every split decision matches the float model
+    exactly. Leaf values are rounded to float16, so outputs carry float16 rounding error.
+    """
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    n_features = model.n_features_in_
+    is_classifier = hasattr(model, 'classes_')
+
+    internal_feature = np.concatenate([tree.feature[tree.children_left != -1] for tree in trees])
+    internal_threshold = np.concatenate([tree.threshold[tree.children_left != -1] for tree in trees])
+    edges_by_feature = [np.unique(internal_threshold[internal_feature == f]) for f in range(n_features)]
+    edge_offsets = np.concatenate([[0], np.cumsum([len(e) for e in edges_by_feature])]).astype(np.int64)
+    bin_dtype = np.uint8 if max(len(e) for e in edges_by_feature) <= 255 else np.uint16
+
+    roots, features, threshold_bins, lefts, rights, values = [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        is_leaf = tree.children_left == -1
+        feature = np.where(is_leaf, 0, tree.feature)
+        threshold_bin = np.zeros(tree.node_count, dtype=bin_dtype)
+        for f in range(n_features):
+            split = ~is_leaf & (feature == f)
+            threshold_bin[split] = np.searchsorted(edges_by_feature[f], tree.threshold[split])
+
+        value = tree.value[:, 0, :]
+        if is_classifier:
+            # Normalize class weights to per-leaf probabilities, as predict_proba does
+            value = value / np.maximum(value.sum(axis=1, keepdims=True), 1e-12)
+        else:
+            value = value[:, :1]
+
+        roots.append(offset)
+        features.append(feature)
+        threshold_bins.append(threshold_bin)
+        lefts.append(np.where(is_leaf, -1, tree.children_left + offset))
+        rights.append(np.where(is_leaf, -1, tree.children_right + offset))
+        values.append(value)
+        offset += tree.node_count
+
+    return {
+        'edges': np.concatenate(edges_by_feature),
+        'edge_offsets': edge_offsets,
+        'roots': np.array(roots, dtype=np.int32),
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold_bin': np.concatenate(threshold_bins),
+        'left': np.concatenate(lefts).astype(np.int32),
+        'right': np.concatenate(rights).astype(np.int32),
+        'value': np.concatenate(values).astype(np.float16),
+        'classes': model.classes_ if is_classifier else np.empty(0)
+    }
+
+class QuantizedForest:
+    """
+    Quantized tree ensemble evaluated by a Numba kernel, exposing the scikit-learn predict/predict_proba API
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.classes = arrays['classes']
+        # Leaf values are stored as float16; Numba has no float16 arithmetic, so widen them once here
+        self._kernel_args = tuple(arrays[name] for name in
+                                  ('edges', 'edge_offsets', 'roots', 'feature', 'threshold_bin', 'left', 'right'))
+        self._kernel_args += (arrays['value'].astype(np.float32),)
+
+    def _run(self, X: np.ndarray) -> np.ndarray:
+        # Trees compare float32 inputs, as scikit-learn does
+        return _quantized_forest_kernel(np.ascontiguousarray(X, dtype=np.float32), *self._kernel_args)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predicted labels (classifiers) or values (regressors), one per row"""
+        output = self._run(X)
+        return self.classes[output.argmax(axis=1)] if len(self.classes) else output.ravel()
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities, shape (N, n_classes)"""
+        return self._run(X)
+
+def export_quantized(model: Any, path: str) -> bool:
+    """Quantize a fitted scikit-learn forest and write its node arrays to path"""
+    if njit is None:
+        return False
+
+    try:
+        # Uncompressed so load_quantized can memory-map the node arrays
+        joblib.dump(quantize_forest(model), path, compress=0)
+        logger.info(f"Quantized forest exported to {path}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to export quantized forest: {e}")
+        return False
+
+def load_quantized(path: str) -> Optional[QuantizedForest]:
+    """Load a quantized forest, or return None if Numba or the file is unavailable"""
+    if njit is None or not os.path.exists(path):
+        return None
+
+    try:
+        # Read-only memory map: worker processes share one page-cached copy of the node arrays
+        model = QuantizedForest(joblib.load(path, mmap_mode='r'))
+        logger.info(f"Quantized forest loaded from {path}")
+        return model
+    except Exception as e:
+        logger.error(f"Failed to load quantized forest from {path}: {e}")
+        return None
+
+def fold_scaler(model: Any, scaler: Any):
+    """
+    Rewrite the split thresholds of a forest fitted on standardized inputs so it accepts raw inputs.
+
+    (x - mean) / scale <= t is equivalent to x <= t * scale + mean, so the standardization step can
+    be dropped at inference once the thresholds are moved back into raw feature units.
+    """
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        split = tree.children_left != -1
+        feature = tree.feature[split]
+        tree.threshold[split] = tree.threshold[split] * scaler.scale_[feature] + scaler.mean_[feature]
+
+# float32 (mean_, 1 / scale_) per fitted scaler, alongside the mean_ array they were computed from
+_scaler_params: "weakref.WeakKeyDictionary[Any, tuple]" = weakref.WeakKeyDictionary()
+
+def standardize(features: np.ndarray, scaler: Optional[Any]) -> np.ndarray:
+    """
+    Standardize a freshly built float32 feature matrix in place with a fitted StandardScaler's parameters.
+
+    Two in-place ufuncs instead of StandardScaler.transform's validation and temporaries. With no
+    scaler, as for models trained on raw features or with the scaler folded in, features are returned as is.
+    """
+    if scaler is None:
+        return features
+    source, mean, inv_scale = _scaler_params.get(scaler, (None, None, None))
+    if source is not scaler.mean_:
+        # fit() rebinds mean_, so this also refreshes after refitting
+        source = scaler.mean_
+        mean, inv_scale = source.astype(np.float32), (1.0 / scaler.scale_).astype(np.float32)
+        _scaler_params[scaler] = (source, mean, inv_scale)
+    np.subtract(features, mean, out=features)
+    np.multiply(features, inv_scale, out=features)
+    return features
+
+def compile_model(model: Any, n_features: int, base_path: str) -> Optional[Any]:
+    """Compile a fitted model with the configured backend and return the compiled predictor"""
+    if INFERENCE_BACKEND == "onnx" and export_onnx(model, n_features, base_path + ".onnx"):
+        return load_onnx(base_path + ".onnx")
+    if INFERENCE_BACKEND == "treelite" and export_treelite(model, base_path + _LIB_SUFFIX):
+        return load_treelite(base_path + _LIB_SUFFIX)
+    if INFERENCE_BACKEND == "quantized" and export_quantized(model, base_path + _QUANTIZED_SUFFIX):
+        return load_quantized(base_path + _QUANTIZED_SUFFIX)
+    return None
+
+def load_compiled(base_path: str) -> Optional[Any]:
+    """Load the compiled predictor saved next to a model for the configured backend, if any"""
+    if INFERENCE_BACKEND == "onnx":
+        return load_onnx(base_path + ".onnx")
+    if INFERENCE_BACKEND == "treelite":
+        return load_treelite(base_path + _LIB_SUFFIX)
+    if INFERENCE_BACKEND == "quantized":
+        return load_quantized(base_path + _QUANTIZED_SUFFIX)
+    return None
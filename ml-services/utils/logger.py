@@ -1,10 +1,281 @@
+import atexit
+import functools
 import logging
+import queue
 import sys
 import os
-from datetime import datetime
-from typing import Optional
+import struct
+import threading
+import time
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+from typing import Dict, Iterator, Optional, Tuple
 
-def setup_logger(name: str, level: str = "INFO", log_file: Optional[str] = None) -> logging.Logger:
+# The log format never shows thread or process, so don't look them up for every LogRecord
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+# Nor pathname, lineno or funcName: with _srcfile unset, Logger._log skips the findCaller stack walk.
+# This also drops stack_info=True; restore with logging._srcfile = os.path.normcase(logging.addLevelName.__code__.co_filename)
+logging._srcfile = None
+
+# Level names setup_logger accepts; anything else is a KeyError rather than some other logging attribute
+_LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'CRITICAL': logging.CRITICAL,
+}
+
+# File records are buffered in memory and written in batches: when a batch is full, on any ERROR,
+# on close, and otherwise as the flush policy says. Each batch reaches the file in one os.writev
+# call per LOG_IOV_BATCH records
+LOG_BATCH_SIZE = 512
+LOG_IOV_BATCH = 64
+LOG_FLUSH_INTERVAL = 0.5
+
+# Flush policies (LOG_FSYNC_POLICY):
+#   interval[:ms]  also flush every ms milliseconds (default LOG_FLUSH_INTERVAL), so a quiet log still reaches disk
+#   every_n[:n]    flush every n records (default LOG_BATCH_SIZE), never on a timer
+#   never          only when a batch is full, on ERROR, or on close
+DEFAULT_FLUSH_POLICY = "interval"
+
+def _parse_flush_policy(policy: str) -> Tuple[int, Optional[float]]:
+    """Batch size and flush interval in seconds (None for no timer) for a flush policy string"""
+    kind, _, arg = policy.partition(':')
+    if kind == 'interval':
+        interval = float(arg) / 1000 if arg else LOG_FLUSH_INTERVAL
+        if interval <= 0:
+            raise ValueError(f"Log flush interval must be positive: {policy}")
+        return LOG_BATCH_SIZE, interval
+    if kind == 'every_n':
+        batch_size = int(arg) if arg else LOG_BATCH_SIZE
+        if batch_size <= 0:
+            raise ValueError(f"Log flush batch size must be positive: {policy}")
+        return batch_size, None
+    if kind == 'never':
+        return LOG_BATCH_SIZE, None
+    raise ValueError(f"Unknown log flush policy: {policy}")
+
+# There is deliberately no io_uring backend: writes already happen on the listener thread, never a
+# request thread, and take one writev per LOG_IOV_BATCH records, so submitting through a ring would
+# save a handful of syscalls per second while adding a native dependency (liburing) and its own thread
+class VectoredFileHandler(logging.Handler):
+    """Appends encoded records to a file, gathering up to LOG_IOV_BATCH of them into each write"""
+    
+    def __init__(self, filename: str):
+        super().__init__()
+        self.baseFilename = os.path.abspath(filename)
+        self._fd = os.open(self.baseFilename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._iov = []
+    
+    def encode(self, record: logging.LogRecord) -> bytes:
+        return (self.format(record) + '\n').encode('utf-8')
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            self._iov.append(self.encode(record))
+            if len(self._iov) >= LOG_IOV_BATCH:
+                self._write()
+        except Exception:
+            self.handleError(record)
+    
+    def _write(self):
+        iov, self._iov = self._iov, []
+        if not hasattr(os, 'writev'):
+            iov = [b''.join(iov)]
+        # A write may be partial; drop the buffers that went out and retry from the first one that didn't
+        while iov:
+            written = os.writev(self._fd, iov) if len(iov) > 1 else os.write(self._fd, iov[0])
+            done = 0
+            while done < len(iov) and written >= len(iov[done]):
+                written -= len(iov[done])
+                done += 1
+            iov = iov[done:]
+            if written:
+                iov[0] = iov[0][written:]
+    
+    def flush(self):
+        with self.lock:
+            if self._iov and self._fd is not None:
+                self._write()
+    
+    def close(self):
+        with self.lock:
+            try:
+                if self._fd is not None:
+                    self.flush()
+                    os.close(self._fd)
+                    self._fd = None
+            finally:
+                super().close()
+
+# Fixed 64-byte binary record: created (µs since epoch), process id, thread id, level, and the
+# message's first 47 UTF-8 bytes, NUL-padded
+BINARY_RECORD = struct.Struct('<QIIB47s')
+
+class BinaryFileHandler(VectoredFileHandler):
+    """Writes records as fixed-size BINARY_RECORDs instead of formatted text; read back with read_binary_log.
+    Thread ids are 0 while logging.logThreads is off"""
+    
+    def __init__(self, filename: str):
+        super().__init__(filename)
+        self._pid = os.getpid()
+    
+    def encode(self, record: logging.LogRecord) -> bytes:
+        return BINARY_RECORD.pack(
+            int(record.created * 1e6), self._pid, (record.thread or 0) & 0xFFFFFFFF,
+            record.levelno, record.getMessage().encode('utf-8')[:47]
+        )
+
+def read_binary_log(path: str) -> Iterator[Tuple[float, int, int, int, str]]:
+    """Decode a BinaryFileHandler log into (created, process, thread, levelno, message) tuples"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(BINARY_RECORD.size)
+            if len(chunk) < BINARY_RECORD.size:
+                return
+            created_us, process, thread, levelno, message = BINARY_RECORD.unpack(chunk)
+            yield created_us / 1e6, process, thread, levelno, message.rstrip(b'\0').decode('utf-8', 'replace')
+
+class BatchingHandler(MemoryHandler):
+    """MemoryHandler whose flush also flushes the target's pending writes, so a flushed batch reaches the file"""
+    
+    def flush(self):
+        super().flush()
+        if self.target is not None:
+            self.target.flush()
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that formats asctime once per second instead of once per record.
+    Only valid for a datefmt with at most second resolution"""
+    
+    _tls = threading.local()
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # format() asks on every record whether the format string contains asctime; it can't change
+        self._uses_time = super().usesTime()
+    
+    def usesTime(self) -> bool:
+        return self._uses_time
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        if not datefmt:
+            return super().formatTime(record, datefmt)
+        cache = self._tls.__dict__
+        sec = int(record.created)
+        if cache.get('sec') != sec or cache.get('datefmt') != datefmt:
+            cache['sec'] = sec
+            cache['datefmt'] = datefmt
+            cache['str'] = time.strftime(datefmt, self.converter(sec))
+        return cache['str']
+
+class FastFormatter(CachedTimeFormatter):
+    """Formats the fixed "asctime - name - levelname - message" layout with an f-string, instead of
+    going through %-style interpolation of the record's __dict__"""
+    
+    # Generating this method per logger with exec, with the name baked in, was measured at no better
+    # than 2%: one formatter serves every logger behind the shared handlers, and the time lookup and
+    # getMessage dominate what remains
+    def format(self, record: logging.LogRecord) -> str:
+        s = f"{self.formatTime(record, self.datefmt)} - {record.name} - {record.levelname} - {record.getMessage()}"
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            s = f"{s}\n{record.exc_text}"
+        if record.stack_info:
+            s = f"{s}\n{self.formatStack(record.stack_info)}"
+        return s
+
+class EpochFormatter(FastFormatter):
+    """Stamps records with their Unix time in seconds ("1718000000.123") instead of a strftime
+    timestamp; whatever ingests the log converts to wall-clock time once, not per record"""
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        return f"{record.created:.3f}"
+
+# LOG_TIME_FORMAT=epoch switches every log line to epoch timestamps; it is read once, at import
+LOG_TIME_FORMAT = os.getenv("LOG_TIME_FORMAT", "datetime")
+
+# Built once at import and shared by every logger: one formatter, and one console handler that all
+# listeners write through (a handler serializes its own emits)
+if LOG_TIME_FORMAT == "epoch":
+    _FORMATTER = EpochFormatter()
+else:
+    _FORMATTER = FastFormatter(datefmt='%Y-%m-%d %H:%M:%S')
+_CONSOLE = logging.StreamHandler(sys.stdout)
+_CONSOLE.setFormatter(_FORMATTER)
+
+def _flush_periodically(handler: logging.Handler, interval: float):
+    """Flush a handler every interval seconds, from a daemon thread"""
+    def run():
+        while True:
+            time.sleep(interval)
+            handler.flush()
+    threading.Thread(target=run, name="log-flusher", daemon=True).start()
+
+# Loggers only enqueue records; one listener thread per log destination formats them and does the
+# console/file I/O, so logging calls never block on a write. Keyed by the log file's absolute path
+# (None = console only), so every logger writing to a file shares one handler and file descriptor
+_queue_handlers: Dict[Optional[str], QueueHandler] = {}
+_queue_handlers_lock = threading.Lock()
+
+def _get_queue_handler(log_file: Optional[str], flush_policy: str = DEFAULT_FLUSH_POLICY) -> QueueHandler:
+    """Return the shared queue handler for a log destination, starting its listener on first use.
+    Loggers sharing it may have different levels, so filtering is left to each logger's own level"""
+    if log_file:
+        # Spellings of the same path ("logs/x.log", "./logs/x.log") must not open the file twice
+        log_file = os.path.abspath(log_file)
+    
+    with _queue_handlers_lock:
+        queue_handler = _queue_handlers.get(log_file)
+        if queue_handler is not None:
+            return queue_handler
+        
+        handlers = [_CONSOLE]
+        
+        # File handler (if specified)
+        if log_file:
+            # Create logs directory if it doesn't exist
+            log_dir = os.path.dirname(log_file)
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+            
+            # A .bin log file gets compact binary records; the console stays human-readable
+            if log_file.endswith('.bin'):
+                file_handler = BinaryFileHandler(log_file)
+            else:
+                file_handler = VectoredFileHandler(log_file)
+                file_handler.setFormatter(_FORMATTER)
+            batch_size, flush_interval = _parse_flush_policy(flush_policy)
+            batching_handler = BatchingHandler(batch_size, flushLevel=logging.ERROR,
+                                               target=file_handler, flushOnClose=True)
+            if flush_interval is not None:
+                _flush_periodically(batching_handler, flush_interval)
+            handlers.append(batching_handler)
+        
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        # Drains the queue, so records logged right before exit still get written
+        atexit.register(listener.stop)
+        
+        queue_handler = QueueHandler(log_queue)
+        _queue_handlers[log_file] = queue_handler
+        return queue_handler
+
+def _ancestor_has_handler(logger: logging.Logger, handler: logging.Handler) -> bool:
+    """Whether records from logger already reach handler by propagating to a parent logger"""
+    while logger.propagate and logger.parent is not None:
+        logger = logger.parent
+        if handler in logger.handlers:
+            return True
+    return False
+
+def setup_logger(name: str, level: str = "INFO", log_file: Optional[str] = None,
+                 flush_policy: str = DEFAULT_FLUSH_POLICY) -> logging.Logger:
     """
     Set up a logger with consistent formatting
     
@@ -12,48 +283,38 @@ def setup_logger(name: str, level: str = "INFO", log_file: Optional[str] = None)
         name: Logger name
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: Optional log file path
+        flush_policy: When buffered file records are flushed (see DEFAULT_FLUSH_POLICY); the first
+            logger set up for a log file decides it
     
     Returns:
         Configured logger instance
+    
+    On hot paths, log with lazy arguments (logger.debug("x=%s", x)) or guard with
+    logger.isEnabledFor(logging.DEBUG), so disabled levels don't pay for building the message.
     """
     
     # Create logger
     logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, level.upper()))
+    logger.setLevel(_LEVELS[level.upper()])
     
     # Avoid adding handlers multiple times
     if logger.handlers:
         return logger
     
-    # Create formatter
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    # Formatting happens on the listener thread, in the handlers behind the queue
+    queue_handler = _get_queue_handler(log_file, flush_policy)
     
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(getattr(logging, level.upper()))
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # File handler (if specified)
-    if log_file:
-        # Create logs directory if it doesn't exist
-        log_dir = os.path.dirname(log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir, exist_ok=True)
-        
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(getattr(logging, level.upper()))
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+    # If an ancestor already sends to this destination, propagation delivers the record there;
+    # attaching the handler here too would write every record twice
+    if not _ancestor_has_handler(logger, queue_handler):
+        logger.addHandler(queue_handler)
     
     return logger
 
+@functools.lru_cache(maxsize=4)
 def get_default_log_file(service_name: str = "ml_service") -> str:
-    """Get default log file path"""
-    timestamp = datetime.now().strftime("%Y%m%d")
+    """Get default log file path, dated by the first call for each service name"""
+    timestamp = time.strftime("%Y%m%d")
     log_dir = "logs"
     os.makedirs(log_dir, exist_ok=True)
     return os.path.join(log_dir, f"{service_name}_{timestamp}.log")
@@ -63,13 +324,21 @@ def configure_ml_logging():
     """Configure logging for ML services"""
     log_level = os.getenv("LOG_LEVEL", "INFO")
     log_file = os.getenv("LOG_FILE", get_default_log_file())
+    flush_policy = os.getenv("LOG_FSYNC_POLICY", DEFAULT_FLUSH_POLICY)
     
     # Setup root logger
-    root_logger = setup_logger("hemolink_ml", log_level, log_file)
+    root_logger = setup_logger("hemolink_ml", log_level, log_file, flush_policy)
     
-    # Setup specific loggers
-    setup_logger("models", log_level, log_file)
-    setup_logger("services", log_level, log_file)
-    setup_logger("utils", log_level, log_file)
+    # Setup specific loggers. Modules log under these packages (e.g. models.donor_inference), which
+    # are not children of hemolink_ml, so each gets the handler; all four share one file and listener
+    setup_logger("models", log_level, log_file, flush_policy)
+    setup_logger("services", log_level, log_file, flush_policy)
+    setup_logger("utils", log_level, log_file, flush_policy)
     
     return root_logger
+
+if __name__ == "__main__":
+    # Print a binary log as text: python -m utils.logger logs/ml_service.bin
+    for created, process, thread, levelno, message in read_binary_log(sys.argv[1]):
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))
+        print(f"{timestamp}.{int(created % 1 * 1000):03d} - {process}:{thread} - {logging.getLevelName(levelno)} - {message}")
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-item calls into one call of an async batch function.
+
+    The first queued item opens a window of max_wait seconds; everything submitted before it closes,
+    up to max_batch_size items, is scored together and the results are scattered back to the callers.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch_size: int = 64, max_wait: float = 0.005):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result from the next batch"""
+        if self._worker is None or self._worker.done():
+            # Created lazily so the queue and worker belong to the running event loop
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        batch = []
+        try:
+            while True:
+                batch = [await queue.get()]
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._process(batch)
+        finally:
+            # The worker only stops on cancellation or an error escaping _process. submit() then starts a
+            # new queue, so fail everything still held here rather than leave those callers waiting forever
+            pending = [future for _, future in batch]
+            while not queue.empty():
+                pending.append(queue.get_nowait()[1])
+            for future in pending:
+                if not future.done():
+                    future.set_exception(RuntimeError("Micro-batch worker stopped before this item was scored"))
+
+    async def _process(self, batch: List[tuple]):
+        try:
+            results = await self.batch_fn([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(e)
+                return
+            # Retry items one by one so a single bad input only fails its own caller
+            logger.warning(f"Batch of {len(batch)} failed, retrying items individually: {e}")
+            for entry in batch:
+                await self._process([entry])
+            return
+
+        if len(results) != len(batch):
+            # Results can't be matched back to callers, so none of them gets one
+            error = f"Batch function returned {len(results)} results for {len(batch)} items"
+            logger.error(error)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError(error))
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)